@@ -0,0 +1,129 @@
+from array import array
+
+import numpy as np
+
+
+class StringArena:
+    """Sequence of strings stored as one UTF-8 buffer plus an offsets array
+
+    The base buffer can be a read-only memory map; strings appended or
+    replaced afterwards are kept in a small Python overlay, so the arena
+    supports the list operations the retrieval engine needs without
+    copying the base.
+    """
+
+    def __init__(self, offsets=None, data=None):
+        self._offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        self._data = data if data is not None else np.zeros(0, dtype=np.uint8)
+        self._base_len = len(self._offsets) - 1
+        self._extra = []
+        self._overrides = {}
+
+    @classmethod
+    def from_strings(cls, strings):
+        builder = ArenaBuilder()
+        for s in strings:
+            builder.append(s)
+        return builder.build()
+
+    def to_arrays(self):
+        """Return (offsets, data) covering every string, overlay included"""
+        if not self._extra and not self._overrides:
+            return self._offsets, self._data
+        return StringArena.from_strings(self).to_arrays()
+
+    def __len__(self):
+        return self._base_len + len(self._extra)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if idx in self._overrides:
+            return self._overrides[idx]
+        if idx >= self._base_len:
+            return self._extra[idx - self._base_len]
+        if idx < 0:
+            raise IndexError("arena index out of range")
+        start, end = self._offsets[idx], self._offsets[idx + 1]
+        return self._data[start:end].tobytes().decode('utf-8')
+
+    def __setitem__(self, idx, value):
+        if not 0 <= idx < len(self):
+            raise IndexError("arena index out of range")
+        if idx >= self._base_len:
+            self._extra[idx - self._base_len] = value
+        else:
+            self._overrides[idx] = value
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def append(self, value):
+        self._extra.append(value)
+
+
+class ArenaBuilder:
+    """Appends strings straight into a growing byte buffer, for streaming loads"""
+
+    def __init__(self):
+        self._offsets = array('q', [0])
+        self._data = bytearray()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def append(self, value):
+        self._data += value.encode('utf-8')
+        self._offsets.append(len(self._data))
+
+    def build(self):
+        return StringArena(np.frombuffer(self._offsets, dtype=np.int64),
+                           np.frombuffer(self._data, dtype=np.uint8))
+
+
+class CategoryColumn:
+    """List of strings from a small vocabulary, stored as int32 codes
+
+    Categories repeat on every row, so each row costs four bytes instead
+    of a string object.  Supports the same list operations as StringArena.
+    """
+
+    def __init__(self, values=()):
+        self.names = []
+        self._codes = {}
+        self._rows = array('i')
+        for value in values:
+            self.append(value)
+
+    @property
+    def codes(self):
+        # A copy: a live view would stop the array from growing
+        return np.array(self._rows, dtype=np.int32)
+
+    def _code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.names)
+            self.names.append(value)
+        return code
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self.names[code] for code in self._rows[idx]]
+        return self.names[self._rows[idx]]
+
+    def __setitem__(self, idx, value):
+        self._rows[idx] = self._code(value)
+
+    def __iter__(self):
+        for code in self._rows:
+            yield self.names[code]
+
+    def append(self, value):
+        self._rows.append(self._code(value))
@@ -0,0 +1,257 @@
+"""Versioned on-disk model artifact for the retrieval engine.
+
+The artifact is a single file: a small JSON header followed by 64-byte
+aligned raw arrays (vocabulary, IDF weights, the TF-IDF matrix in CSC form
+and the question/answer/category strings).  Loading memory-maps the file,
+so startup cost does not grow with the corpus and worker processes share
+the same physical pages.
+
+Usage:
+    python artifact.py build [dataset.csv] [dataset.model]
+"""
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+import scipy.sparse as sp
+
+from arena import StringArena
+
+
+MAGIC = b'CHATIDX\0'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct('<8sII')
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def source_fingerprint(path, with_hash=True):
+    """Size, mtime and (optionally) SHA-256 of the source CSV"""
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        fingerprint['sha256'] = digest.hexdigest()
+    return fingerprint
+
+
+def is_fresh(header, source_path):
+    """True if the artifact was built from the current contents of source_path
+
+    An unchanged size and mtime is trusted; otherwise the file is hashed,
+    so a touched but identical CSV does not force a rebuild.
+    """
+    built_from = header.get('source')
+    if not built_from or not os.path.exists(source_path):
+        return False
+    current = source_fingerprint(source_path, with_hash=False)
+    if current['size'] != built_from['size']:
+        return False
+    if current['mtime_ns'] == built_from['mtime_ns']:
+        return True
+    return source_fingerprint(source_path)['sha256'] == built_from['sha256']
+
+
+class MappedVectorizer:
+    """Query-side TF-IDF transform over a memory-mapped, sorted vocabulary
+
+    Produces the same vectors as the TfidfVectorizer it was saved from, but
+    looks terms up by binary search instead of building a vocabulary dict.
+    """
+
+    def __init__(self, terms, idf, params):
+        self.terms = terms
+        self.idf_ = idf
+        self.params = params
+        self._analyzer = None
+        self._lookup = lru_cache(maxsize=65536)(self._find)
+
+    def _find(self, term):
+        pos = bisect.bisect_left(self.terms, term)
+        if pos < len(self.terms) and self.terms[pos] == term:
+            return pos
+        return -1
+
+    def transform(self, texts):
+        if self._analyzer is None:
+            # sklearn is slow to import and only needed once queries arrive
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._analyzer = TfidfVectorizer(**self.params).build_analyzer()
+        indptr, indices, values = [0], [], []
+        for text in texts:
+            counts = Counter(self._lookup(term) for term in self._analyzer(text))
+            counts.pop(-1, None)
+            indices.extend(counts)
+            values.extend(counts.values())
+            indptr.append(len(indices))
+        matrix = sp.csr_matrix((np.asarray(values, dtype=np.float64), indices, indptr),
+                               shape=(len(indptr) - 1, len(self.terms)))
+        matrix.sort_indices()
+        if self.params.get('binary'):
+            matrix.data[:] = 1
+        if self.params.get('sublinear_tf'):
+            np.log(matrix.data, out=matrix.data)
+            matrix.data += 1
+        if self.params.get('use_idf', True):
+            matrix.data *= self.idf_[matrix.indices]
+        norm = self.params.get('norm', 'l2')
+        if norm:
+            from sklearn.preprocessing import normalize
+            matrix = normalize(matrix, norm=norm, copy=False)
+        return matrix
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_artifact(engine, path, source_path=None):
+    """Serialise a fitted engine to path (written atomically via a temp file)
+
+    Only the base index is written: call through RetrievalEngine.save,
+    which compacts pending changes first.  Raises ArtifactError for
+    vectorizer settings the header cannot hold, such as a callable
+    tokenizer or preprocessor.
+    """
+    try:
+        json.dumps(engine.vectorizer_params)
+    except TypeError as e:
+        raise ArtifactError(f"Vectorizer settings cannot be saved in an artifact: {e}") from None
+    vectorizer = engine.vectorizer
+    if isinstance(vectorizer, MappedVectorizer):
+        terms_offsets, terms_data = vectorizer.terms.to_arrays()
+    else:
+        terms_offsets, terms_data = StringArena.from_strings(vectorizer.get_feature_names_out()).to_arrays()
+    postings = engine.tfidf_matrix.tocsc()
+    postings.sort_indices()
+    # A vectorizer fitted with use_idf=False has no idf_; the weights are
+    # then never applied, so store ones
+    idf = getattr(vectorizer, 'idf_', None)
+    if idf is None:
+        idf = np.ones(postings.shape[1])
+
+    arrays = {
+        'terms_offsets': terms_offsets,
+        'terms_data': terms_data,
+        'idf': np.asarray(idf, dtype=np.float64),
+        'postings_indptr': postings.indptr.astype(np.int64),
+        'postings_indices': postings.indices.astype(np.int32),
+        'postings_data': postings.data.astype(np.float64),
+        'deleted': np.array(sorted(engine.deleted), dtype=np.int64),
+    }
+    for name in ('questions', 'answers', 'categories'):
+        records = getattr(engine, name)
+        if not isinstance(records, StringArena):
+            records = StringArena.from_strings(records)
+        arrays[f'{name}_offsets'], arrays[f'{name}_data'] = records.to_arrays()
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        offset = _align(offset + array.nbytes)
+
+    header = {
+        'version': FORMAT_VERSION,
+        'n_rows': postings.shape[0],
+        'n_terms': postings.shape[1],
+        'vectorizer_params': engine.vectorizer_params,
+        'source': source_fingerprint(source_path) if source_path and os.path.exists(source_path) else None,
+        'arrays': layout,
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(_PREFIX.size + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_artifact(path):
+    """Memory-map an artifact and return (header, arrays) without copying"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, header_len = _PREFIX.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ArtifactError(f"{path} is not a model artifact")
+    if version != FORMAT_VERSION:
+        raise ArtifactError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+    header = json.loads(buffer[_PREFIX.size:_PREFIX.size + header_len])
+    data_start = _align(_PREFIX.size + header_len)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape']))
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                     offset=data_start + spec['offset']).reshape(spec['shape'])
+    return header, arrays
+
+
+def load_artifact(path, source_path=None):
+    """Return (header, vectorizer, matrix, records) from an artifact file
+
+    Raises ArtifactError if source_path is given and the artifact was built
+    from different contents.
+    """
+    header, arrays = read_artifact(path)
+    if source_path is not None and not is_fresh(header, source_path):
+        raise ArtifactError(f"{path} is stale for {source_path}")
+    # JSON turns tuples into lists; sklearn insists on a tuple for ngram_range
+    params = dict(header['vectorizer_params'])
+    if 'ngram_range' in params:
+        params['ngram_range'] = tuple(params['ngram_range'])
+    header['vectorizer_params'] = params
+    terms = StringArena(arrays['terms_offsets'], arrays['terms_data'])
+    vectorizer = MappedVectorizer(terms, arrays['idf'], params)
+    matrix = sp.csc_matrix(
+        (arrays['postings_data'], arrays['postings_indices'], arrays['postings_indptr']),
+        shape=(header['n_rows'], header['n_terms']), copy=False,
+    )
+    matrix.has_sorted_indices = True
+    records = {
+        name: StringArena(arrays[f'{name}_offsets'], arrays[f'{name}_data'])
+        for name in ('questions', 'answers', 'categories')
+    }
+    records['deleted'] = set(arrays['deleted'].tolist())
+    return header, vectorizer, matrix, records
+
+
+def main(argv):
+    from retrieval import RetrievalEngine
+
+    if not argv or argv[0] != 'build':
+        print(__doc__)
+        return 1
+    source = argv[1] if len(argv) > 1 else 'dataset.csv'
+    target = argv[2] if len(argv) > 2 else os.path.splitext(source)[0] + '.model'
+    engine = RetrievalEngine.from_csv(source)
+    header = engine.save(target, source)
+    print(f"Wrote {target}: {header['n_rows']} rows, {header['n_terms']} terms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,396 @@
+"""Latency benchmarks for the retrieval engine.
+
+``stages`` times every stage of the chatbot on synthetic corpora of
+increasing size (CSV load, refit, artifact load, find_best_match,
+suggestions, fallback replies, history save/load/search) and writes the
+results as JSON; ``compare`` diffs two such files, e.g. from two commits.
+``--profile`` wraps a run in cProfile or tracemalloc.  ``imports`` runs
+``python -X importtime`` on the entry points and reports the slowest
+imports, to keep startup (time-to-interactive) in check.
+
+Needs pandas on top of the app's requirements: pip install -r requirements-bench.txt
+
+Usage:
+    python benchmark.py index --sizes 1000 10000 100000 --queries 500
+    python benchmark.py stages --sizes 1000 10000 100000 --out bench.json
+    python benchmark.py stages --sizes 10000 --profile cprofile
+    python benchmark.py compare before.json after.json
+    python benchmark.py imports chatbot server --top 15
+"""
+import argparse
+import cProfile
+import json
+import os
+import platform
+import pstats
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from history import HistoryStore
+from indexes import BruteForceIndex, InvertedIndex
+from ingest import peak_rss_mb
+from intents import load_intents
+from responder import Responder
+from retrieval import RetrievalEngine
+from suggestions import SuggestionIndex
+
+
+SYLLABLES = ['ba', 'ko', 'ri', 'ten', 'lo', 'mi', 'sa', 'dun', 'pe', 'va',
+             'zor', 'qui', 'nel', 'ta', 'gro', 'fi', 'hal', 'mu', 'ser', 'dy']
+
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_corpus(n_rows, seed=0, vocab_size=None):
+    """Synthetic Q&A frame with the question/answer/category schema of dataset.csv"""
+    rng = random.Random(seed)
+    vocab = make_vocabulary(vocab_size or max(500, int(30 * n_rows ** 0.5)), rng)
+    # Zipf-like word frequencies, like real question text
+    weights = 1.0 / np.arange(1, len(vocab) + 1)
+    np_rng = np.random.default_rng(seed)
+    lengths = np_rng.integers(3, 9, size=n_rows)
+    words = np_rng.choice(len(vocab), size=int(lengths.sum()), p=weights / weights.sum())
+    questions, pos = [], 0
+    for length in lengths:
+        questions.append(' '.join(vocab[w] for w in words[pos:pos + length]))
+        pos += length
+    categories = [f"category{i % 20}" for i in range(n_rows)]
+    answers = [f"Answer {i} about {q}" for i, q in enumerate(questions)]
+    return pd.DataFrame({'question': questions, 'answer': answers, 'category': categories})
+
+
+def make_queries(corpus, n_queries, seed=1):
+    """Paraphrase-ish queries: dataset questions with a word dropped or swapped"""
+    rng = random.Random(seed)
+    questions = corpus['question'].tolist()
+    queries = []
+    for _ in range(n_queries):
+        words = rng.choice(questions).split()
+        if len(words) > 3 and rng.random() < 0.5:
+            words.pop(rng.randrange(len(words)))
+        if rng.random() < 0.3:
+            words[rng.randrange(len(words))] = rng.choice(questions).split()[0]
+        queries.append(' '.join(words))
+    return queries
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def time_queries(engine, queries, k):
+    latencies, top1 = [], []
+    for q in queries:
+        start = time.perf_counter()
+        matches = engine.top_k(q, k)
+        latencies.append(time.perf_counter() - start)
+        top1.append(matches[0].index if matches else -1)
+    return latencies, top1
+
+
+def exact_cosine(engine, queries, rows):
+    rows = np.asarray(rows)
+    query_matrix = engine.vectorizer.transform(queries)
+    scores = np.asarray(query_matrix.multiply(engine.tfidf_matrix[np.maximum(rows, 0)]).sum(axis=1)).ravel()
+    scores[rows < 0] = 0.0
+    return scores
+
+
+def bench_index(sizes, n_queries, k, recalls):
+    factories = [('brute', BruteForceIndex)]
+    factories += [(f"inverted r={r}", partial(InvertedIndex, recall=r)) for r in recalls]
+    rows = []
+    for size in sizes:
+        corpus = make_corpus(size)
+        queries = make_queries(corpus, n_queries)
+        exact_scores = None
+        for name, factory in factories:
+            engine = RetrievalEngine(index_factory=factory)
+            start = time.perf_counter()
+            engine.fit(corpus)
+            fit_time = time.perf_counter() - start
+            latencies, top1 = time_queries(engine, queries, k)
+            # Ties are common in synthetic text, so compare the exact score of
+            # each returned row against the brute-force best, not row ids
+            scores = exact_cosine(engine, queries, top1)
+            if exact_scores is None:
+                exact_scores = scores
+            agreement = np.mean(scores >= exact_scores - 1e-9)
+            rows.append({
+                'rows': size,
+                'index': name,
+                'fit_s': fit_time,
+                'p50_ms': percentile_ms(latencies, 50),
+                'p99_ms': percentile_ms(latencies, 99),
+                'top1_vs_brute': float(agreement),
+            })
+            print(f"{size:>9} {name:<16} fit {fit_time:7.2f}s  "
+                  f"p50 {rows[-1]['p50_ms']:8.3f}ms  p99 {rows[-1]['p99_ms']:8.3f}ms  "
+                  f"top1 agreement {agreement:.3f}")
+    return rows
+
+
+INTENTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intents.json')
+FALLBACK_QUERIES = [
+    'hello there', 'hey', 'what time is it', 'what is the date today', 'thanks a lot',
+    'goodbye', 'xyzzy plugh', 'qwerty uiop asdf', 'zzz', 'lorem ipsum dolor',
+]
+
+
+def summarize(stage, latencies, size=None):
+    """Throughput and latency percentiles for one stage"""
+    total = float(np.sum(latencies))
+    return {
+        'stage': stage,
+        'rows': size,
+        'ops': len(latencies),
+        'seconds': total,
+        'throughput_ops': len(latencies) / total if total else None,
+        'p50_ms': percentile_ms(latencies, 50),
+        'p95_ms': percentile_ms(latencies, 95),
+        'p99_ms': percentile_ms(latencies, 99),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def timed(fn, inputs):
+    latencies = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def once(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, [time.perf_counter() - start]
+
+
+def bench_stages(size, n_queries, n_chats, workdir):
+    """Time every stage on a corpus of size rows; returns one summary per stage"""
+    corpus = make_corpus(size)
+    queries = make_queries(corpus, n_queries)
+    csv_path = os.path.join(workdir, f'corpus{size}.csv')
+    model_path = os.path.join(workdir, f'corpus{size}.model')
+    corpus.to_csv(csv_path, index=False)
+    results = []
+
+    engine, latencies = once(lambda: RetrievalEngine.from_csv(csv_path))
+    results.append(summarize('load_csv', latencies, size))
+    _, latencies = once(engine.fit)
+    results.append(summarize('fit', latencies, size))
+    engine.save(model_path, csv_path)
+    _, latencies = once(lambda: RetrievalEngine.from_artifact(model_path, csv_path))
+    results.append(summarize('load_artifact', latencies, size))
+
+    responder = Responder(engine, load_intents(INTENTS_PATH))
+    results.append(summarize('find_best_match', timed(responder.find_best_match, queries), size))
+    responder.cache.clear()
+    fallbacks = [FALLBACK_QUERIES[i % len(FALLBACK_QUERIES)] for i in range(n_queries)]
+    results.append(summarize('generate_response_fallback', timed(responder.generate_response, fallbacks), size))
+
+    suggestions, latencies = once(lambda: SuggestionIndex.from_rows(engine.rows()))
+    results.append(summarize('suggestions_build', latencies, size))
+    # What the suggestion box sees while a query is typed
+    prefixes = [q[:n] for q in queries[:max(1, n_queries // 10)] for n in range(3, len(q) + 1, 2)]
+    results.append(summarize('get_suggestions', timed(suggestions.suggest, prefixes), size))
+
+    history = HistoryStore(os.path.join(workdir, f'history{size}.db'))
+    questions, answers = corpus['question'].tolist(), corpus['answer'].tolist()
+    chats = []
+    for i in range(n_chats):
+        messages = []
+        for j in range(5):
+            row = (i * 5 + j) % size
+            messages += [f"user: You: {questions[row]}", f"bot: Bot: {answers[row]}"]
+        chats.append(messages)
+    latencies = timed(lambda messages: history.append_chat(messages[0][:50], '2024-01-01 12:00', messages), chats)
+    results.append(summarize('history_save', latencies, size))
+    chat_ids = [chat.id for chat in history.page(limit=n_chats)]
+    results.append(summarize('history_load', timed(history.get_messages, chat_ids), size))
+    results.append(summarize('history_search', timed(history.search, queries[:100]), size))
+    history.close()
+
+    for result in results:
+        print(f"{size:>9} {result['stage']:<28} {result['ops']:>6} ops  "
+              f"{result['throughput_ops'] or 0:>10.1f}/s  p50 {result['p50_ms']:9.3f}ms  "
+              f"p95 {result['p95_ms']:9.3f}ms  p99 {result['p99_ms']:9.3f}ms  "
+              f"rss {result['peak_rss_mb'] or 0:6.0f}MB")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stages(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        results = []
+        for size in args.sizes:
+            results += bench_stages(size, args.queries, args.chats, workdir)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': args.sizes,
+            'queries': args.queries,
+            'chats': args.chats,
+            # Profiled runs are much slower; don't compare them with plain ones
+            'profile': args.profile,
+        },
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.out}")
+    return report
+
+
+def profiled(run, args):
+    """Run once under cProfile or tracemalloc and print the top entries"""
+    if args.profile == 'cprofile':
+        profiler = cProfile.Profile()
+        result = profiler.runcall(run, args)
+        profiler.dump_stats('benchmark.prof')
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+        print("Full profile written to benchmark.prof")
+        return result
+    tracemalloc.start()
+    result = run(args)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Peak traced memory: {peak / (1 << 20):.1f} MB")
+    for stat in snapshot.statistics('lineno')[:15]:
+        print(stat)
+    return result
+
+
+def compare(before_path, after_path, threshold):
+    """Print the p50/p99 change of every stage; returns the number of regressions"""
+    with open(before_path) as f:
+        before = {(r['stage'], r['rows']): r for r in json.load(f)['results']}
+    with open(after_path) as f:
+        after = json.load(f)['results']
+    regressions = 0
+    for result in after:
+        old = before.get((result['stage'], result['rows']))
+        if old is None:
+            continue
+        line = f"{result['rows']:>9} {result['stage']:<28}"
+        for key in ('p50_ms', 'p99_ms'):
+            ratio = result[key] / old[key] if old[key] else float('inf')
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = ' !'
+                regressions += 1
+            line += f"  {key} {old[key]:9.3f} -> {result[key]:9.3f} ({ratio:5.2f}x){flag}"
+        print(line)
+    return regressions
+
+
+def import_times(module):
+    """Parse ``python -X importtime -c 'import module'`` into (name, self_us, cumulative_us, depth) rows"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def import_report(modules, top):
+    report = {}
+    for module in modules:
+        rows = import_times(module)
+        total = next((cumulative for name, _, cumulative, depth in rows if name == module and depth == 0), 0)
+        slowest = sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+        print(f"import {module}: {total / 1000:.1f} ms ({len(rows)} modules)")
+        for name, self_us, cumulative_us, depth in slowest:
+            print(f"    {cumulative_us / 1000:9.1f} ms cumulative {self_us / 1000:8.1f} ms self  {name}")
+        report[module] = {
+            'total_ms': total / 1000,
+            'modules': len(rows),
+            'slowest': [{'module': name, 'self_ms': s / 1000, 'cumulative_ms': c / 1000}
+                        for name, s, c, _ in slowest],
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    index_parser = sub.add_parser('index', help='query latency of each index as the corpus grows')
+    index_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    index_parser.add_argument('--queries', type=int, default=500)
+    index_parser.add_argument('-k', type=int, default=3)
+    index_parser.add_argument('--recalls', type=float, nargs='+', default=[1.0, 0.8, 0.5])
+
+    stages_parser = sub.add_parser('stages', help='time every stage and save the results as JSON')
+    stages_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    stages_parser.add_argument('--queries', type=int, default=500)
+    stages_parser.add_argument('--chats', type=int, default=500, help='chats saved in the history stage')
+    stages_parser.add_argument('--out', help='write the results to this JSON file')
+    stages_parser.add_argument('--profile', choices=['cprofile', 'tracemalloc'])
+
+    compare_parser = sub.add_parser('compare', help='compare two stages result files')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='flag stages more than this fraction slower')
+
+    imports_parser = sub.add_parser('imports', help='import time of the entry points (python -X importtime)')
+    imports_parser.add_argument('modules', nargs='*', default=['chatbot', 'server'])
+    imports_parser.add_argument('--top', type=int, default=10)
+    imports_parser.add_argument('--out', help='write the report to this JSON file')
+
+    args = parser.parse_args()
+    if args.command == 'index':
+        bench_index(args.sizes, args.queries, args.k, args.recalls)
+    elif args.command == 'stages':
+        if args.profile:
+            profiled(run_stages, args)
+        else:
+            run_stages(args)
+    elif args.command == 'imports':
+        report = import_report(args.modules, args.top)
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump({'commit': git_commit(), 'imports': report}, f, indent=2)
+    elif args.command == 'compare':
+        if compare(args.before, args.after, args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import CACHE_REQUESTS
+
+
+MISSING = object()
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+_SPACES = re.compile(r'\s+')
+
+
+# TfidfVectorizer settings that decide how text is split into terms, with
+# their defaults; only under these does normalize_query() never merge two
+# queries the vectorizer would tell apart
+_TOKENIZER_DEFAULTS = {
+    'analyzer': 'word',
+    'lowercase': True,
+    'preprocessor': None,
+    'tokenizer': None,
+    'token_pattern': r'(?u)\b\w\w+\b',
+    'strip_accents': None,
+}
+
+
+def normalizes_queries(vectorizer_params):
+    """True if normalize_query() keys are safe under these TfidfVectorizer settings"""
+    return all(vectorizer_params.get(name, default) == default for name, default in _TOKENIZER_DEFAULTS.items())
+
+
+def normalize_query(text):
+    """Lower-case, drop punctuation and collapse whitespace
+
+    TfidfVectorizer's default word analyzer ignores all of these, so
+    under the default settings queries that normalise to the same key get
+    the same match; check other settings with normalizes_queries().
+    """
+    return _SPACES.sub(' ', _NON_WORD.sub(' ', text.lower())).strip()
+
+
+class ResponseCache:
+    """Bounded LRU cache of match results with a per-entry TTL
+
+    Callers pass the engine generation the result will be computed
+    against; seeing a newer generation drops the whole cache, so answers
+    never outlive a dataset change.  Generations must only increase.
+    ``key`` maps a query to its cache key; queries with equal keys must
+    get the same result.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300.0, key=normalize_query):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.key = key
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def get(self, query, generation=0):
+        """Return the cached result for query, or MISSING"""
+        key = self.key(query)
+        now = time.monotonic()
+        with self._lock:
+            if self._generation is None or generation > self._generation:
+                self._entries.clear()
+                self._generation = generation
+            entry = self._entries.get(key) if generation == self._generation else None
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    CACHE_REQUESTS.inc('hit')
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+        CACHE_REQUESTS.inc('miss')
+        return MISSING
+
+    def put(self, query, value, generation=0):
+        key = self.key(query)
+        with self._lock:
+            # Don't store a result computed against data that has since changed
+            if generation == self._generation:
+                self._entries[key] = (value, time.monotonic() + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+    def lookup(self, query, compute, generation=0):
+        """Return the cached result for query, calling compute(query) on a miss"""
+        value = self.get(query, generation)
+        if value is MISSING:
+            value = compute(query)
+            self.put(query, value, generation)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
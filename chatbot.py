@@ -1,23 +1,29 @@
+import time
+# Taken before the other imports so time-to-interactive includes them
+PROCESS_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import nltk
-import pandas as pd
-import speech_recognition as sr
-import pyttsx3
 import threading
-import json
+import csv
+import logging
 import os
-import random
 from datetime import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+from history import HistoryStore, parse_search
+from intents import load_intents
+from metrics import ERRORS, STAGE_SECONDS, STARTUP_SECONDS, configure_from_env
+from responder import Responder
+from suggestions import SuggestionIndex
+from transcript import Transcript
+from workers import Busy, RequestPool, SpeechQueue
+
+SUGGESTION_DELAY_MS = 150
+HISTORY_PAGE_SIZE = 20
+# Budget for the window to first appear; exceeding it is logged
+FIRST_PAINT_TARGET_MS = 300
+
+log = logging.getLogger(__name__)
 
-# Initialize NLTK - make sure punkt is downloaded
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
 
 class AdvancedChatbot:
     def __init__(self, root):
@@ -26,105 +32,91 @@ class AdvancedChatbot:
         self.root.geometry("1400x800")
         self.root.configure(bg='#2b2b2b')
         
-        # Initialize speech engine
-        self.speech_engine = pyttsx3.init()
-        self.speech_engine.setProperty('rate', 150)
-        
-        # Load dataset
-        self.dataset = self.load_dataset()
-        self.vectorizer = TfidfVectorizer()
-        self.setup_similarity_model()
+        # Speech runs on its own thread so text replies never wait for audio
+        self.speech = SpeechQueue(self.create_speech_engine)
+        # Retrieval runs on a small fixed pool instead of a thread per message
+        self.workers = RequestPool(workers=2, max_pending=8)
+        
+        # The dataset, vectorizer and model load on a background thread once
+        # the window has been painted; replies wait for _dataset_ready
+        self.engine = None
+        self.responder = None
+        self.intents = load_intents('intents.json')
+        self._dataset_ready = threading.Event()
+        # Built on the loading thread so startup doesn't pay for it
+        self.suggestion_index = None
+        self._suggestion_job = None
+        self._last_suggestion_query = None
         
         # Chat history
-        self.chat_history = []
+        self.history = None
+        self.history_ids = []
+        self._history_last = None
+        self._history_exhausted = False
+        self._searching = False
+        # current_chat and current_categories are only touched on the Tk
+        # thread; _chat_epoch goes up whenever the chat is left, so replies
+        # still in flight for the old chat are dropped
         self.current_chat = []
+        self.current_categories = set()
+        self._chat_epoch = 0
         
         self.setup_ui()
         self.load_chat_history()
+        # Idle callbacks run in order, so this one runs after the first paint
+        self.root.after_idle(self.on_first_paint)
     
-    def load_dataset(self):
-        """Load the CSV dataset"""
-        try:
-            df = pd.read_csv('dataset.csv')
-            print(f"Dataset loaded with {len(df)} records")
-            return df
-        except FileNotFoundError:
-            print("Dataset file not found. Creating sample dataset...")
-            return self.create_sample_dataset()
-        except Exception as e:
-            print(f"Error loading dataset: {e}")
-            return self.create_sample_dataset()
-    
-    def create_sample_dataset(self):
-        """Create a sample dataset if file doesn't exist"""
-        data = {
-            'question': [
-                'hello', 'hi', 'how are you', 'what is your name', 'what can you do',
-                'tell me a joke', 'what is python', 'how to learn coding',
-                'what is machine learning', 'what is artificial intelligence',
-                'good morning', 'good afternoon', 'good evening', 'who created you',
-                'what time is it', 'how to make coffee', 'what is photosynthesis',
-                'benefits of exercise', 'book recommendations', 'how to play guitar'
-            ],
-            'answer': [
-                'Hello! How can I assist you today?',
-                'Hi there! What can I help you with?',
-                "I'm doing great, thank you! How can I assist you?",
-                "I'm an AI chatbot designed to help with your questions.",
-                'I can answer questions, provide information, help with calculations, and more!',
-                "Why don't scientists trust atoms? Because they make up everything!",
-                'Python is a high-level programming language known for its simplicity and readability.',
-                'Start with basic programming concepts, practice regularly, and build small projects.',
-                'Machine learning is a subset of AI that enables computers to learn from data.',
-                'AI is the simulation of human intelligence in machines.',
-                'Good morning! How are you doing today?',
-                'Good afternoon! How can I help you?',
-                'Good evening! What would you like to know?',
-                'I was created by a developer to assist with various tasks.',
-                'I cannot access real-time information, but you can check your device clock.',
-                'Boil water, add coffee grounds, pour hot water, and let it brew.',
-                'Photosynthesis is how plants convert sunlight into energy.',
-                'Exercise improves health, boosts mood, and increases energy levels.',
-                'I recommend "Atomic Habits", "The Alchemist", and "Sapiens".',
-                'Start with basic chords, practice regularly, and learn simple songs.'
-            ],
-            'category': [
-                'greeting', 'greeting', 'greeting', 'about', 'about',
-                'fun', 'programming', 'advice', 'technology', 'technology',
-                'greeting', 'greeting', 'greeting', 'about', 'information',
-                'cooking', 'science', 'health', 'entertainment', 'hobbies'
-            ]
-        }
-        return pd.DataFrame(data)
-    
-    def setup_similarity_model(self):
-        """Setup TF-IDF vectorizer for similarity matching"""
+    def on_first_paint(self):
+        elapsed = time.perf_counter() - PROCESS_START
+        STARTUP_SECONDS.set(elapsed, 'first_paint')
+        log.info("Window painted %.0f ms after start", elapsed * 1000)
+        if elapsed * 1000 > FIRST_PAINT_TARGET_MS:
+            log.warning("First paint took longer than the %d ms target", FIRST_PAINT_TARGET_MS)
+        threading.Thread(target=self.load_in_background, name='chatbot-load', daemon=True).start()
+    
+    def load_in_background(self):
         try:
-            questions = self.dataset['question'].tolist()
-            self.tfidf_matrix = self.vectorizer.fit_transform(questions)
-        except Exception as e:
-            print(f"Error setting up similarity model: {e}")
+            self.load_dataset()
+            self.responder = Responder(self.engine, self.intents)
+            # Pay for the vectorizer's first use (and its sklearn import) now
+            # rather than on the first message
+            self.engine.top_k('warm up', k=1)
+            # One pass over the corpus: keep it off the Tk thread
+            self.suggestion_index = SuggestionIndex.from_rows(self.engine.rows())
+        except Exception:
+            ERRORS.inc('load')
+            log.exception("Error loading the dataset")
+        finally:
+            self._dataset_ready.set()
+        self.root.after(0, self.on_dataset_ready)
+    
+    def on_dataset_ready(self):
+        elapsed = time.perf_counter() - PROCESS_START
+        STARTUP_SECONDS.set(elapsed, 'interactive')
+        log.info("Dataset ready %.0f ms after start", elapsed * 1000)
+        if self.responder is not None:
+            self.status_label.config(text=f"Dataset: ✅ {len(self.engine)} records", fg='#4CAF50')
+        else:
+            self.status_label.config(text="Dataset: ❌ failed to load", fg='#f44336')
+    
+    def load_dataset(self):
+        """Load the dataset, memory-mapping the prebuilt model when it is up to date"""
+        # numpy/scipy (and sklearn, when fitting) load here, off the UI thread
+        from retrieval import load_engine
+        self.engine = load_engine('dataset.csv', 'dataset.model')
+    
+    def answer(self, user_input):
+        """(response, category) for user_input; runs on a worker thread"""
+        self._dataset_ready.wait()
+        if self.responder is None:
+            intent, response = self.intents.reply(user_input)
+            return response, intent
+        return self.responder.respond(user_input)
     
     def find_best_match(self, user_input):
         """Find the best matching question in the dataset"""
-        try:
-            # Transform user input
-            user_tfidf = self.vectorizer.transform([user_input])
-            
-            # Calculate cosine similarity
-            similarities = cosine_similarity(user_tfidf, self.tfidf_matrix)
-            best_match_idx = similarities.argmax()
-            best_similarity = similarities[0, best_match_idx]
-            
-            # Return best match if similarity is above threshold
-            if best_similarity > 0.3:
-                return self.dataset.iloc[best_match_idx]['answer']
-            else:
-                return None
-                
-        except Exception as e:
-            print(f"Error in similarity matching: {e}")
-            return None
+        self._dataset_ready.wait()
+        return self.responder.find_best_match(user_input) if self.responder else None
     
     def setup_ui(self):
         # Main frame
@@ -156,10 +148,15 @@ class AdvancedChatbot:
         new_chat_btn.pack(pady=10, padx=20, fill=tk.X)
         
         # Dataset Status
-        status_text = f"Dataset: ✅ {len(self.dataset)} records"
-        status_label = tk.Label(parent, text=status_text, font=('Arial', 10),
-                               bg='#3c3c3c', fg='#4CAF50')
-        status_label.pack(pady=5)
+        self.status_label = tk.Label(parent, text="Dataset: ⏳ loading...", font=('Arial', 10),
+                                     bg='#3c3c3c', fg='#888888')
+        self.status_label.pack(pady=5)
+        
+        # Search box: keywords plus optional category:/since:/until: filters
+        self.search_entry = tk.Entry(parent, font=('Arial', 10), bg='#2b2b2b', fg='white',
+                                     insertbackground='white')
+        self.search_entry.pack(padx=10, pady=(5, 0), fill=tk.X)
+        self.search_entry.bind('<Return>', self.search_history)
         
         # History list
         history_frame = tk.Frame(parent, bg='#3c3c3c')
@@ -168,6 +165,7 @@ class AdvancedChatbot:
         self.history_listbox = tk.Listbox(history_frame, bg='#2b2b2b', fg='white',
                                          selectbackground='#4CAF50', font=('Arial', 10))
         self.history_listbox.pack(fill=tk.BOTH, expand=True)
+        self.history_listbox.config(yscrollcommand=self.on_history_scroll)
         self.history_listbox.bind('<<ListboxSelect>>', self.load_selected_chat)
         
         # Dataset Management button
@@ -186,6 +184,7 @@ class AdvancedChatbot:
                                                      font=('Arial', 11),
                                                      state=tk.DISABLED)
         self.chat_display.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.transcript = Transcript(self.chat_display)
         
         # Input area
         input_frame = tk.Frame(parent, bg='#2b2b2b')
@@ -223,7 +222,17 @@ class AdvancedChatbot:
         clear_btn.pack(side=tk.LEFT, padx=5)
     
     def on_input_change(self, event=None):
+        # Coalesce fast typing: only the text present once the user pauses is looked up
+        if self._suggestion_job is not None:
+            self.root.after_cancel(self._suggestion_job)
+        self._suggestion_job = self.root.after(SUGGESTION_DELAY_MS, self.update_suggestions)
+    
+    def update_suggestions(self):
+        self._suggestion_job = None
         current_text = self.input_entry.get()
+        if current_text == self._last_suggestion_query:
+            return
+        self._last_suggestion_query = current_text
         if current_text:
             suggestions = self.get_suggestions(current_text)
             self.suggestions_label.config(text=f"Suggestions: {', '.join(suggestions)}")
@@ -232,18 +241,11 @@ class AdvancedChatbot:
     
     def get_suggestions(self, query):
         """Get suggestions based on input"""
-        query_lower = query.lower()
-        
-        # Get categories from dataset
-        categories = self.dataset['category'].unique().tolist()
-        
-        # Filter dataset for similar questions
-        similar_questions = []
-        for question in self.dataset['question']:
-            if query_lower in question.lower():
-                similar_questions.append(question)
-        
-        return similar_questions[:3] if similar_questions else ["Ask me anything!", "Try a question", "Need help?"]
+        if self.suggestion_index is None:
+            return ["Ask me anything!", "Try a question", "Need help?"]
+        with STAGE_SECONDS.time('suggest'):
+            similar_questions = self.suggestion_index.suggest(query, limit=3)
+        return similar_questions if similar_questions else ["Ask me anything!", "Try a question", "Need help?"]
     
     def send_message(self, event=None):
         user_input = self.input_entry.get().strip()
@@ -253,64 +255,42 @@ class AdvancedChatbot:
         self.input_entry.delete(0, tk.END)
         self.display_message(f"You: {user_input}", "user")
         
-        # Process message in thread
-        threading.Thread(target=self.process_message, args=(user_input,), daemon=True).start()
+        self.process_message(user_input)
     
     def process_message(self, user_input):
-        response = self.generate_response(user_input)
+        epoch = self._chat_epoch
+        # The callback runs on a worker thread; hand the reply to the Tk thread
+        deliver = lambda result: self.root.after(0, self.deliver_response, result, epoch)
+        try:
+            self.workers.submit(self.answer, user_input, callback=deliver)
+        except Busy:
+            self.display_message("Bot: I'm still answering your previous messages, please wait a moment.", "bot")
+    
+    def deliver_response(self, result, epoch):
+        if epoch != self._chat_epoch:
+            return
+        response, category = result
+        if category:
+            self.current_categories.add(category)
         self.display_message(f"Bot: {response}", "bot")
         self.speak_response(response)
     
     def generate_response(self, user_input):
         """Generate response using the dataset"""
-        # Try to find best match in dataset
-        best_match = self.find_best_match(user_input)
-        
-        if best_match:
-            return best_match
-        
-        # Fallback responses for common queries
-        input_lower = user_input.lower()
-        
-        # Greeting detection
-        if any(word in input_lower for word in ['hello', 'hi', 'hey', 'hola']):
-            return random.choice([
-                "Hello! How can I help you today?",
-                "Hi there! What would you like to know?",
-                "Hey! How can I assist you?"
-            ])
-        
-        # Time related
-        elif any(word in input_lower for word in ['time', 'clock', 'hour']):
-            return f"The current time is {datetime.now().strftime('%H:%M:%S')}"
-        
-        # Date related
-        elif any(word in input_lower for word in ['date', 'day', 'today']):
-            return f"Today is {datetime.now().strftime('%A, %B %d, %Y')}"
-        
-        # Thank you
-        elif any(word in input_lower for word in ['thank', 'thanks']):
-            return "You're welcome! Is there anything else I can help with?"
-        
-        # Goodbye
-        elif any(word in input_lower for word in ['bye', 'goodbye', 'exit', 'quit']):
-            return "Goodbye! Feel free to chat again anytime!"
-        
-        # Default response
-        else:
-            return random.choice([
-                "That's an interesting question! I'm still learning, but I'll try to help.",
-                "I understand you're asking about that. Could you try rephrasing your question?",
-                "I'm not sure I have the answer to that in my dataset yet.",
-                "That's a great question! My knowledge is based on my training data.",
-                "I'm constantly learning. Could you ask me something else?"
-            ])
+        return self.answer(user_input)[0]
     
     def start_voice_input(self):
         """Start voice input in English"""
         threading.Thread(target=self.process_voice_input, daemon=True).start()
     
     def process_voice_input(self):
+        # Imported on first use: the microphone stack is slow to load and
+        # most sessions never touch it
+        try:
+            import speech_recognition as sr
+        except ImportError:
+            self.display_message("Bot: Voice input is not available (speech_recognition is not installed)", "bot")
+            return
         recognizer = sr.Recognizer()
         with sr.Microphone() as source:
             try:
@@ -328,100 +308,128 @@ class AdvancedChatbot:
             except sr.WaitTimeoutError:
                 self.display_message("Bot: No speech detected", "bot")
     
+    def create_speech_engine(self):
+        """Called once, on the speech thread"""
+        import pyttsx3
+        engine = pyttsx3.init()
+        engine.setProperty('rate', 150)
+        return engine
+    
     def speak_response(self, text):
         """Convert text to speech in English"""
-        try:
-            self.speech_engine.say(text)
-            self.speech_engine.runAndWait()
-        except:
-            pass
+        self.speech.say(text)
     
     def display_message(self, message, sender):
-        self.root.after(0, self._update_display, message, sender)
-    
-    def _update_display(self, message, sender):
-        self.chat_display.config(state=tk.NORMAL)
-        
-        # Add timestamp
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Configure tags for different senders
-        self.chat_display.tag_config('user', foreground='#4CAF50')
-        self.chat_display.tag_config('bot', foreground='#2196F3')
-        self.chat_display.tag_config('timestamp', foreground='#888888')
-        
-        # Insert message with formatting
-        self.chat_display.insert(tk.END, f"[{timestamp}] ", 'timestamp')
-        self.chat_display.insert(tk.END, f"{message}\n\n", sender)
-        
-        self.chat_display.config(state=tk.DISABLED)
-        self.chat_display.see(tk.END)
-        
-        # Add to current chat
+        if threading.current_thread() is not threading.main_thread():
+            # e.g. the voice input thread: record the message on the Tk thread
+            self.root.after(0, self.display_message, message, sender)
+            return
+        # Queued and drawn with the other messages of the same frame
+        self.transcript.add(message, sender)
         self.current_chat.append(f"{sender}: {message}")
     
     def start_new_chat(self):
         if self.current_chat:
             self.save_current_chat()
+        self.cancel_pending_replies()
         self.current_chat = []
-        self.chat_display.config(state=tk.NORMAL)
-        self.chat_display.delete(1.0, tk.END)
-        self.chat_display.config(state=tk.DISABLED)
+        self.current_categories = set()
+        self.transcript.clear()
         self.display_message("Bot: Started a new chat! Ask me anything from my knowledge base.", "bot")
     
+    def clear_chat(self):
+        self.cancel_pending_replies()
+        self.current_chat = []
+        self.current_categories = set()
+        self.transcript.clear()
+    
+    def cancel_pending_replies(self):
+        """Drop replies and speech that belong to the chat being left"""
+        self._chat_epoch += 1
+        self.workers.cancel_pending()
+        self.speech.clear()
+    
     def save_current_chat(self):
         if self.current_chat:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-            chat_data = {
-                'title': self.current_chat[0][:50] + "..." if len(self.current_chat[0]) > 50 else self.current_chat[0],
-                'timestamp': timestamp,
-                'messages': self.current_chat
-            }
-            self.chat_history.append(chat_data)
-            self.save_chat_history()
-            self.update_history_list()
+            title = self.current_chat[0][:50] + "..." if len(self.current_chat[0]) > 50 else self.current_chat[0]
+            try:
+                chat_id = self.history.append_chat(title, timestamp, self.current_chat,
+                                                   self.current_categories)
+            except Exception:
+                ERRORS.inc('history_save')
+                log.exception("Error saving chat history")
+                return
+            if self._searching:
+                return
+            # Newest chats are listed first, so the new one goes on top
+            self.history_ids.insert(0, chat_id)
+            self.history_listbox.insert(0, f"{timestamp} - {title}")
     
     def load_selected_chat(self, event):
         selection = self.history_listbox.curselection()
         if selection:
             index = selection[0]
-            chat_data = self.chat_history[index]
-            
-            self.chat_display.config(state=tk.NORMAL)
-            self.chat_display.delete(1.0, tk.END)
-            
-            for message in chat_data['messages']:
-                if message.startswith('user:'):
-                    self.chat_display.insert(tk.END, f"{message}\n\n", 'user')
-                else:
-                    self.chat_display.insert(tk.END, f"{message}\n\n", 'bot')
-            
-            self.chat_display.config(state=tk.DISABLED)
-            self.chat_display.see(tk.END)
+            # Only the latest messages are drawn; older ones render on scroll-back
+            self.transcript.replace(self.history.get_messages(self.history_ids[index]))
     
     def update_history_list(self):
+        self._searching = False
         self.history_listbox.delete(0, tk.END)
-        for chat in self.chat_history[-20:]:
-            self.history_listbox.insert(tk.END, f"{chat['timestamp']} - {chat['title']}")
+        self.history_ids = []
+        self._history_last = None
+        self.load_history_page()
     
-    def load_chat_history(self):
+    def load_history_page(self):
+        """Append the next page of older chats to the sidebar"""
+        chats = self.history.page(before=self._history_last, limit=HISTORY_PAGE_SIZE)
+        for chat in chats:
+            self.history_ids.append(chat.id)
+            self.history_listbox.insert(tk.END, f"{chat.timestamp} - {chat.title}")
+        if chats:
+            self._history_last = chats[-1]
+        self._history_exhausted = len(chats) < HISTORY_PAGE_SIZE
+    
+    def on_history_scroll(self, first, last):
+        # Fetch the next page once the user scrolls to the bottom of the list
+        if float(last) >= 1.0 and not self._history_exhausted and self.history_ids and not self._searching:
+            self.load_history_page()
+    
+    def search_history(self, event=None):
+        """Show the best matching past chats; an empty search restores the full list"""
+        keywords, filters = parse_search(self.search_entry.get())
+        if not keywords:
+            self.update_history_list()
+            return
         try:
-            if os.path.exists('chat_history.json'):
-                with open('chat_history.json', 'r') as f:
-                    self.chat_history = json.load(f)
-                self.update_history_list()
-        except:
-            self.chat_history = []
-    
-    def save_chat_history(self):
+            hits = self.history.search(keywords, limit=50, **filters)
+        except Exception:
+            ERRORS.inc('history_search')
+            log.exception("Error searching chat history")
+            hits = []
+        self._searching = True
+        self.history_listbox.delete(0, tk.END)
+        self.history_ids = [hit.chat_id for hit in hits]
+        for hit in hits:
+            self.history_listbox.insert(tk.END, f"{hit.timestamp} - {hit.snippet}")
+    
+    def load_chat_history(self):
         try:
-            with open('chat_history.json', 'w') as f:
-                json.dump(self.chat_history[-50:], f)
-        except:
-            pass
+            self.history = HistoryStore('chat_history.db')
+            imported = self.history.import_json('chat_history.json')
+            if imported:
+                log.info("Imported %d chats from chat_history.json", imported)
+        except Exception:
+            ERRORS.inc('history_open')
+            log.exception("Error opening chat history")
+            self.history = HistoryStore(':memory:')
+        self.update_history_list()
     
     def show_dataset_management(self):
         """Show dataset management window"""
+        if self.responder is None:
+            messagebox.showinfo("Dataset Management", "The dataset is still loading, please try again in a moment.")
+            return
         dataset_window = tk.Toplevel(self.root)
         dataset_window.title("Dataset Management")
         dataset_window.geometry("600x500")
@@ -431,7 +439,9 @@ class AdvancedChatbot:
                 bg='#2b2b2b', fg='white').pack(pady=20)
         
         # Dataset info
-        info_text = f"Records: {len(self.dataset)}\nCategories: {len(self.dataset['category'].unique())}"
+        cache_stats = self.responder.cache.stats()
+        info_text = (f"Records: {len(self.engine)}\nCategories: {len(self.engine.category_names())}\n"
+                     f"Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
         info_label = tk.Label(dataset_window, text=info_text, font=('Arial', 12),
                              bg='#2b2b2b', fg='white')
         info_label.pack(pady=10)
@@ -459,4 +469,45 @@ class AdvancedChatbot:
         
         # Add button
         tk.Button(add_frame, text="Add to Dataset", command=self.add_to_dataset,
-                 bg='#4CAF50', 
+                 bg='#4CAF50', fg='white').pack(pady=10)
+    
+    def add_to_dataset(self):
+        """Add a new Q&A pair to the dataset without refitting the model"""
+        question = self.new_question.get().strip()
+        answer = self.new_answer.get().strip()
+        category = self.new_category.get().strip() or 'general'
+        
+        if not question or not answer:
+            messagebox.showwarning("Warning", "Please enter both question and answer")
+            return
+        
+        # Only the new row is vectorised; the engine refits in the background
+        # once enough rows have changed
+        idx = self.engine.add(question, answer, category)
+        if self.suggestion_index is not None:
+            self.suggestion_index.add(idx, question)
+        
+        try:
+            write_header = not os.path.exists('dataset.csv')
+            with open('dataset.csv', 'a', newline='') as f:
+                writer = csv.writer(f)
+                if write_header:
+                    writer.writerow(['question', 'answer', 'category'])
+                writer.writerow([question, answer, category])
+        except Exception:
+            ERRORS.inc('dataset_save')
+            log.exception("Error saving dataset")
+        
+        self.new_question.delete(0, tk.END)
+        self.new_answer.delete(0, tk.END)
+        self.new_category.delete(0, tk.END)
+        messagebox.showinfo("Success", "Q&A added to dataset!")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    configure_from_env()
+    root = tk.Tk()
+    app = AdvancedChatbot(root)
+    root.mainloop()
+
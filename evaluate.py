@@ -0,0 +1,193 @@
+"""Offline evaluation of the matcher against a labeled paraphrase set.
+
+The labels file is a CSV with a ``query`` column and an ``expected``
+column holding the dataset question that query should match.  Without
+--labels, paraphrases are generated from the dataset itself (a word
+dropped, words swapped, a filler phrase added).
+
+Configurations and chunks of the labeled pairs are scored in parallel
+worker processes, each fitting a configuration once.  For each threshold
+the report shows:
+    top1      best match is the expected row and clears the threshold
+    topK      expected row is among the K best, whatever the threshold
+    fallback  best score is at or below the threshold (random fallback reply)
+    wrong     best match clears the threshold but is the wrong row
+
+Usage:
+    python evaluate.py [--csv dataset.csv] [--labels paraphrases.csv]
+                       [--configs word char_wb_2_4 ...] [--thresholds 0.2 0.3 0.4]
+                       [-k 3] [--jobs N] [--out evaluation.json]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cache import normalize_query
+
+
+# Vectorizer settings to compare; each is passed to RetrievalEngine as-is
+PRESETS = {
+    'word': {},
+    'word_sublinear': {'sublinear_tf': True},
+    'word_stop': {'stop_words': 'english'},
+    'word_1_2': {'ngram_range': (1, 2), 'sublinear_tf': True},
+    'char_wb_2_4': {'analyzer': 'char_wb', 'ngram_range': (2, 4)},
+    'char_wb_3_5_sublinear': {'analyzer': 'char_wb', 'ngram_range': (3, 5), 'sublinear_tf': True},
+}
+DEFAULT_THRESHOLDS = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+FILLERS = ['please', 'can you tell me', 'i want to know', 'quick question', 'hey']
+
+
+def read_labels(path):
+    """[(query, expected question)] from a query/expected CSV"""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = {'query', 'expected'} - set(reader.fieldnames or ())
+        if missing:
+            raise SystemExit(f"{path} is missing column(s): {', '.join(sorted(missing))}")
+        return [(row['query'], row['expected']) for row in reader if row['query'].strip()]
+
+
+def generate_paraphrases(questions, n, seed=0):
+    """[(query, expected question)] made by perturbing dataset questions"""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(n):
+        question = rng.choice(questions)
+        words = normalize_query(question).split()
+        if len(words) > 3 and rng.random() < 0.5:
+            words.pop(rng.randrange(len(words)))
+        if len(words) > 2 and rng.random() < 0.3:
+            i = rng.randrange(len(words) - 1)
+            words[i], words[i + 1] = words[i + 1], words[i]
+        if rng.random() < 0.3:
+            words.insert(0, rng.choice(FILLERS))
+        pairs.append((' '.join(words), question))
+    return pairs
+
+
+# Fitted engines of this worker process by configuration name, each with
+# its {cache key: row} map, so every worker fits a configuration once
+_ENGINES = {}
+
+
+def _engine(name, params, csv_path):
+    if name not in _ENGINES:
+        from retrieval import RetrievalEngine
+
+        engine = RetrievalEngine(**params)
+        engine.load(csv_path)
+        rows = {engine.cache_key(question): idx for idx, question, _, _ in engine.rows()}
+        _ENGINES[name] = engine, rows
+    return _ENGINES[name]
+
+
+def score_chunk(name, params, csv_path, pairs, k):
+    """Match one chunk of pairs under one configuration; runs in a worker process
+
+    Returns the best score, top-1 hit and top-k hit of every pair whose
+    expected question is in the dataset, and the number of other pairs.
+    """
+    engine, rows = _engine(name, params, csv_path)
+    expected = np.array([rows.get(engine.cache_key(question), -1) for _, question in pairs], dtype=np.int64)
+    known = expected >= 0
+    queries = [query for (query, _), ok in zip(pairs, known) if ok]
+    expected = expected[known]
+
+    results = engine.batch_top_k(queries, k=k)
+    best_score = np.array([matches[0].score if matches else 0.0 for matches in results])
+    top1_hit = np.array([bool(matches) and matches[0].index == row for matches, row in zip(results, expected)],
+                        dtype=bool)
+    topk_hit = np.array([any(match.index == row for match in matches) for matches, row in zip(results, expected)],
+                        dtype=bool)
+    return best_score, top1_hit, topk_hit, int((~known).sum())
+
+
+def summarize(name, params, best_score, top1_hit, topk_hit, k, thresholds):
+    """One result row per threshold for one configuration"""
+    n = len(best_score)
+    rows_out = []
+    for threshold in thresholds:
+        answered = best_score > threshold
+        rows_out.append({
+            'config': name,
+            'params': {key: list(value) if isinstance(value, tuple) else value for key, value in params.items()},
+            'threshold': threshold,
+            'queries': n,
+            'top1': float(np.mean(top1_hit & answered)) if n else 0.0,
+            f'top{k}': float(np.mean(topk_hit)) if n else 0.0,
+            'fallback': float(np.mean(~answered)) if n else 0.0,
+            'wrong': float(np.mean(answered & ~top1_hit)) if n else 0.0,
+        })
+    return rows_out
+
+
+def run(csv_path, pairs, configs, thresholds, k, jobs):
+    """Score every configuration, with the pairs split so all jobs have work
+
+    Each configuration's pairs go out in about jobs / len(configs) chunks:
+    a single configuration still uses every core, while many
+    configurations don't make every worker fit all of them.
+    """
+    chunks = max(1, -(-jobs // len(configs)))
+    size = max(1, -(-len(pairs) // chunks))
+    results, skipped = [], 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            name: [pool.submit(score_chunk, name, PRESETS[name], csv_path, pairs[start:start + size], k)
+                   for start in range(0, max(len(pairs), 1), size)]
+            for name in configs
+        }
+        for name in configs:
+            parts = [future.result() for future in futures[name]]
+            best_score, top1_hit, topk_hit = (np.concatenate([part[i] for part in parts]) for i in range(3))
+            # Every configuration sees the same pairs, so the count is the same
+            skipped = sum(part[3] for part in parts)
+            results += summarize(name, PRESETS[name], best_score, top1_hit, topk_hit, k, thresholds)
+    return results, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', default='dataset.csv')
+    parser.add_argument('--labels', help='CSV with query,expected columns (default: generated paraphrases)')
+    parser.add_argument('--generate', type=int, default=500, help='paraphrases to generate without --labels')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--configs', nargs='+', choices=sorted(PRESETS), default=list(PRESETS))
+    parser.add_argument('--thresholds', type=float, nargs='+', default=DEFAULT_THRESHOLDS)
+    parser.add_argument('-k', type=int, default=3)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--out', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    if args.labels:
+        pairs = read_labels(args.labels)
+    else:
+        from ingest import ingest_csv
+        pairs = generate_paraphrases(list(ingest_csv(args.csv).questions), args.generate, args.seed)
+
+    results, skipped = run(args.csv, pairs, args.configs, args.thresholds, args.k, args.jobs)
+    if skipped:
+        print(f"Skipped {skipped} labels whose expected question is not in {args.csv}")
+    topk = f'top{args.k}'
+    print(f"{'config':<24} {'threshold':>9} {'top1':>7} {topk:>7} {'fallback':>9} {'wrong':>7}")
+    for row in results:
+        print(f"{row['config']:<24} {row['threshold']:>9.2f} {row['top1']:>7.1%} {row[topk]:>7.1%} "
+              f"{row['fallback']:>9.1%} {row['wrong']:>7.1%}")
+    best = max(results, key=lambda row: (row['top1'], -row['wrong']))
+    print(f"Best: {best['config']} at threshold {best['threshold']:.2f} "
+          f"(top1 {best['top1']:.1%}, fallback {best['fallback']:.1%}, wrong {best['wrong']:.1%})")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'csv': args.csv, 'labels': args.labels or f'generated:{args.generate}:{args.seed}',
+                       'k': args.k, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
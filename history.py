@@ -0,0 +1,221 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+
+from metrics import STAGE_SECONDS
+
+
+log = logging.getLogger(__name__)
+
+
+ChatSummary = namedtuple('ChatSummary', ['id', 'timestamp', 'title'])
+SearchHit = namedtuple('SearchHit', ['chat_id', 'timestamp', 'title', 'snippet', 'score'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    title TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chats_timestamp ON chats (timestamp, id);
+CREATE INDEX IF NOT EXISTS chats_title ON chats (title);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    chat_id INTEGER NOT NULL REFERENCES chats (id),
+    seq INTEGER NOT NULL,
+    sender TEXT NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (chat_id, seq)
+);
+CREATE TABLE IF NOT EXISTS chat_categories (
+    chat_id INTEGER NOT NULL REFERENCES chats (id),
+    category TEXT NOT NULL,
+    PRIMARY KEY (category, chat_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Full-text index over message text, kept up to date by a trigger so each
+# saved chat only indexes its own messages.  It is keyed on messages.id: an
+# implicit rowid could be renumbered by VACUUM behind the index's back
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(text, content='messages', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+_WORD = re.compile(r'\w+')
+_FILTER = re.compile(r'\b(category|since|until):(\S+)')
+
+
+def parse_search(text):
+    """Split 'python category:programming since:2024-01-01' into (keywords, filters)"""
+    filters = {name: value for name, value in _FILTER.findall(text)}
+    return _FILTER.sub(' ', text).strip(), filters
+
+
+def split_message(message):
+    """'user: You: hi' -> ('user', 'You: hi'), the format used by current_chat"""
+    sender, sep, text = message.partition(': ')
+    return (sender, text) if sep else ('bot', message)
+
+
+class HistoryStore:
+    """Append-only chat history in SQLite (WAL mode)
+
+    Saving a chat inserts its rows in one transaction, so the cost does not
+    depend on how much history already exists and a crash never leaves a
+    half-written file.  Nothing is dropped; the sidebar reads it a page at
+    a time through the timestamp index.
+    """
+
+    def __init__(self, path='chat_history.db'):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self.searchable = self._create_fts()
+
+    def _create_fts(self):
+        existed = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'").fetchone()
+        try:
+            self._conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            log.warning("Full-text search unavailable: %s", e)
+            return False
+        if not existed:
+            # Index messages saved before the search index existed
+            self._conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+        return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def append_chat(self, title, timestamp, messages, categories=()):
+        """Store a finished chat (and the answer categories it touched) and return its id"""
+        with STAGE_SECONDS.time('history_save'), self._lock, self._conn:
+            return self._insert_chat(title, timestamp, messages, categories)
+
+    def _insert_chat(self, title, timestamp, messages, categories=()):
+        chat_id = self._conn.execute(
+            "INSERT INTO chats (timestamp, title) VALUES (?, ?)", (timestamp, title)).lastrowid
+        self._conn.executemany(
+            "INSERT INTO messages (chat_id, seq, sender, text) VALUES (?, ?, ?, ?)",
+            [(chat_id, seq, *split_message(message)) for seq, message in enumerate(messages)])
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO chat_categories (chat_id, category) VALUES (?, ?)",
+            [(chat_id, category) for category in set(categories)])
+        return chat_id
+
+    def search(self, keywords, limit=20, since=None, until=None, category=None):
+        """Rank chats by BM25 over their messages; one SearchHit per chat, best first
+
+        The last keyword matches as a prefix so results update while typing.
+        ``since``/``until`` compare against the chat timestamp (e.g.
+        '2024-05' or '2024-05-17'); ``until`` is inclusive.
+        """
+        words = _WORD.findall(keywords)
+        if not words or not self.searchable:
+            return []
+        match = ' '.join(f'"{word}"' for word in words) + '*'
+        sql = (
+            "SELECT m.chat_id, c.timestamp, c.title, "
+            "snippet(messages_fts, 0, '[', ']', '...', 10), bm25(messages_fts) AS score "
+            "FROM messages_fts "
+            "JOIN messages m ON m.id = messages_fts.rowid "
+            "JOIN chats c ON c.id = m.chat_id "
+            "WHERE messages_fts MATCH ?"
+        )
+        params = [match]
+        if since:
+            sql += " AND c.timestamp >= ?"
+            params.append(since)
+        if until:
+            sql += " AND c.timestamp <= ?"
+            params.append(until + '\uffff')
+        if category:
+            sql += " AND c.id IN (SELECT chat_id FROM chat_categories WHERE category = ?)"
+            params.append(category)
+        # Several messages of one chat can match; over-fetch, keep the best per chat
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit * 5)
+        with STAGE_SECONDS.time('history_search'), self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        hits, seen = [], set()
+        for row in rows:
+            if row[0] not in seen:
+                seen.add(row[0])
+                hits.append(SearchHit(*row))
+                if len(hits) == limit:
+                    break
+        return hits
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chats").fetchone()[0]
+
+    def page(self, before=None, limit=20):
+        """Newest chats first, as ChatSummary tuples
+
+        Pass the last ChatSummary of the previous page as ``before`` to get
+        the next one; the timestamp index makes every page equally cheap.
+        """
+        with self._lock:
+            if before is None:
+                rows = self._conn.execute(
+                    "SELECT id, timestamp, title FROM chats ORDER BY timestamp DESC, id DESC LIMIT ?",
+                    (limit,)).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT id, timestamp, title FROM chats WHERE (timestamp, id) < (?, ?) "
+                    "ORDER BY timestamp DESC, id DESC LIMIT ?",
+                    (before.timestamp, before.id, limit)).fetchall()
+        return [ChatSummary(*row) for row in rows]
+
+    def find_by_title(self, prefix, limit=20):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, timestamp, title FROM chats WHERE title >= ? AND title < ? "
+                "ORDER BY title LIMIT ?", (prefix, prefix + '\uffff', limit)).fetchall()
+        return [ChatSummary(*row) for row in rows]
+
+    def get_messages(self, chat_id):
+        """Messages of one chat in the 'sender: text' form used by the window"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sender, text FROM messages WHERE chat_id = ? ORDER BY seq", (chat_id,)).fetchall()
+        return [f"{sender}: {text}" for sender, text in rows]
+
+    def import_json(self, path='chat_history.json'):
+        """One-time import of the old chat_history.json; returns the number of chats imported"""
+        if not os.path.exists(path):
+            return 0
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'imported_json'").fetchone()
+        if done:
+            return 0
+        try:
+            with open(path, 'r') as f:
+                chats = json.load(f)
+        except Exception as e:
+            log.error("Error reading %s: %s", path, e)
+            return 0
+        # One transaction, so an interrupted import is retried from scratch
+        with self._lock, self._conn:
+            for chat in chats:
+                self._insert_chat(chat['title'], chat['timestamp'], chat['messages'])
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('imported_json', ?)", (path,))
+        return len(chats)
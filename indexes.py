@@ -0,0 +1,120 @@
+import numpy as np
+
+
+class BruteForceIndex:
+    """Exact scan: one sparse product against every row of the matrix"""
+
+    def __init__(self, matrix):
+        self.matrix_t = matrix.T.tocsr()
+
+    def search(self, queries, k, exclude=None):
+        """Return (row indices, scores) of the k best rows for each query row
+
+        ``exclude`` is an optional sorted array of row indices to skip.
+        """
+        # Rows are L2-normalised, so a dot product is the cosine similarity
+        scores = (queries @ self.matrix_t).tocsr()
+        results = []
+        for row in range(scores.shape[0]):
+            lo, hi = scores.indptr[row], scores.indptr[row + 1]
+            indices, data = drop_excluded(scores.indices[lo:hi], scores.data[lo:hi], exclude)
+            results.append(top_k(indices, data, k))
+        return results
+
+
+class InvertedIndex:
+    """Term-at-a-time scoring over per-term postings with early termination
+
+    Query terms are visited in order of their best possible contribution.
+    Once the k-th best partial score is above the most any unseen row
+    could still reach, no new rows are admitted and the remaining terms
+    only update the existing candidates, so with ``recall=1.0`` the result
+    is exact.  Lower ``recall`` values skip the trailing low-weight terms
+    whose combined upper bound is below ``1 - recall`` of the query's total,
+    trading accuracy for latency on long postings lists.
+    """
+
+    def __init__(self, matrix, recall=1.0):
+        if not 0 < recall <= 1:
+            raise ValueError("recall must be in (0, 1]")
+        self.recall = recall
+        postings = matrix.tocsc()
+        postings.sort_indices()
+        self.indptr = postings.indptr
+        self.indices = postings.indices
+        self.data = postings.data
+        self.max_weights = np.zeros(matrix.shape[1])
+        lengths = np.diff(self.indptr)
+        nonempty = lengths > 0
+        self.max_weights[nonempty] = np.maximum.reduceat(self.data, self.indptr[:-1][nonempty])
+
+    def search(self, queries, k, exclude=None):
+        """Return (row indices, scores) of the k best rows for each query row
+
+        ``exclude`` is an optional sorted array of row indices to skip.
+        """
+        queries = queries.tocsr()
+        results = []
+        for row in range(queries.shape[0]):
+            lo, hi = queries.indptr[row], queries.indptr[row + 1]
+            results.append(self._search_one(queries.indices[lo:hi], queries.data[lo:hi], k, exclude))
+        return results
+
+    def _search_one(self, terms, weights, k, exclude):
+        cand_idx = np.empty(0, dtype=self.indices.dtype)
+        cand_scores = np.empty(0)
+        if len(terms) == 0:
+            return cand_idx, cand_scores
+
+        bounds = weights * self.max_weights[terms]
+        order = np.argsort(-bounds, kind='stable')
+        terms, weights, bounds = terms[order], weights[order], bounds[order]
+        remaining = np.cumsum(bounds[::-1])[::-1]
+        cutoff = (1 - self.recall) * remaining[0]
+
+        for i, (term, weight) in enumerate(zip(terms, weights)):
+            if i > 0 and remaining[i] <= cutoff:
+                break
+            lo, hi = self.indptr[term], self.indptr[term + 1]
+            post_idx, post_data = self.indices[lo:hi], self.data[lo:hi]
+
+            if len(cand_idx) >= k and kth_largest(cand_scores, k) > remaining[i]:
+                # No unseen row can reach the top k any more, not even as a
+                # tie (which it could win with a lower index): only update candidates
+                pos = np.searchsorted(post_idx, cand_idx)
+                pos[pos == len(post_idx)] = 0
+                hit = post_idx[pos] == cand_idx if len(post_idx) else np.zeros(len(cand_idx), bool)
+                cand_scores[hit] += weight * post_data[pos[hit]]
+            else:
+                merged_idx = np.concatenate([cand_idx, post_idx])
+                merged_scores = np.concatenate([cand_scores, weight * post_data])
+                cand_idx, inverse = np.unique(merged_idx, return_inverse=True)
+                cand_scores = np.bincount(inverse, weights=merged_scores)
+                cand_idx, cand_scores = drop_excluded(cand_idx, cand_scores, exclude)
+
+        return top_k(cand_idx, cand_scores, k)
+
+
+def drop_excluded(indices, scores, exclude):
+    if exclude is None or not len(exclude) or not len(indices):
+        return indices, scores
+    pos = np.minimum(np.searchsorted(exclude, indices), len(exclude) - 1)
+    keep = exclude[pos] != indices
+    return indices[keep], scores[keep]
+
+
+def kth_largest(scores, k):
+    return np.partition(scores, len(scores) - k)[len(scores) - k]
+
+
+def top_k(indices, scores, k):
+    """Pick the k highest scores without sorting the whole row
+
+    Ties are broken towards the lower row index, like ``argmax``.
+    """
+    if len(scores) > k:
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        keep = scores >= kth
+        indices, scores = indices[keep], scores[keep]
+    order = np.lexsort((indices, -scores))[:k]
+    return indices[order], scores[order]
@@ -0,0 +1,138 @@
+"""Streaming CSV ingestion for the retrieval engine.
+
+The CSV is read row by row and never held in memory as a whole: rows are
+validated (rows with unquoted commas in the answer are repaired, short or
+empty rows skipped), duplicate questions dropped, answers and questions
+appended to string arenas and categories to a code column, while the same
+stream of questions feeds TfidfVectorizer.fit_transform.  Reading the
+file, building the records and fitting the index is a single pass.
+
+Usage:
+    python ingest.py [dataset.csv]
+"""
+import csv
+import sys
+import time
+from collections import namedtuple
+
+from arena import ArenaBuilder, CategoryColumn
+from cache import normalize_query, normalizes_queries
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+REQUIRED_COLUMNS = ('question', 'answer', 'category')
+
+IngestReport = namedtuple('IngestReport', [
+    'rows', 'kept', 'duplicates', 'invalid', 'repaired', 'seconds', 'peak_rss_mb',
+])
+Ingested = namedtuple('Ingested', ['questions', 'answers', 'categories', 'vectorizer', 'matrix', 'report'])
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+class _Reader:
+    def __init__(self, path, encoding='utf-8', key=None):
+        self.path = path
+        self.encoding = encoding
+        # Maps a stripped question to its dedup key; None keys on the text itself
+        self.key = key
+        self.questions = ArenaBuilder()
+        self.answers = ArenaBuilder()
+        self.categories = CategoryColumn()
+        self.rows = self.duplicates = self.invalid = self.repaired = 0
+        self._seen = set()
+
+    def __iter__(self):
+        """Yield each kept question, recording its row on the way"""
+        with open(self.path, newline='', encoding=self.encoding) as f:
+            reader = csv.reader(f)
+            header = [name.strip().lower() for name in next(reader, [])]
+            missing = [name for name in REQUIRED_COLUMNS if name not in header]
+            if missing:
+                raise SchemaError(f"{self.path} is missing column(s): {', '.join(missing)}")
+            q_col, a_col, c_col = (header.index(name) for name in REQUIRED_COLUMNS)
+            for row in reader:
+                self.rows += 1
+                if len(row) > len(header):
+                    # Unquoted commas inside the answer: fold the surplus
+                    # fields back into it
+                    end = a_col + len(row) - len(header) + 1
+                    row[a_col:end] = [','.join(row[a_col:end])]
+                    self.repaired += 1
+                elif len(row) < len(header):
+                    self.invalid += 1
+                    continue
+                question, answer = row[q_col].strip(), row[a_col].strip()
+                if not question or not answer:
+                    self.invalid += 1
+                    continue
+                # The first occurrence wins.  The key itself is kept, not
+                # its hash, so a collision can never drop a distinct row
+                key = self.key(question) if self.key else question
+                if key in self._seen:
+                    self.duplicates += 1
+                    continue
+                self._seen.add(key)
+                self.questions.append(question)
+                self.answers.append(answer)
+                self.categories.append(row[c_col].strip())
+                yield question
+
+
+def ingest_csv(path, vectorizer_params=None, encoding='utf-8'):
+    """Read, validate, dedupe and index a question/answer/category CSV
+
+    Questions are duplicates when they normalise alike under the default
+    tokenizer settings, and only when identical otherwise: with e.g. char
+    n-grams or case kept, normalising would merge questions the model can
+    tell apart.  Returns an Ingested tuple; raises SchemaError when a
+    required column is missing and ValueError when no usable rows remain.
+    """
+    # Imported here so opening a prebuilt artifact never loads sklearn
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    start = time.perf_counter()
+    vectorizer_params = vectorizer_params or {}
+    key = normalize_query if normalizes_queries(vectorizer_params) else None
+    reader = _Reader(path, encoding, key)
+    vectorizer = TfidfVectorizer(**vectorizer_params)
+    matrix = vectorizer.fit_transform(reader).tocsr()
+    report = IngestReport(
+        rows=reader.rows,
+        kept=len(reader.questions),
+        duplicates=reader.duplicates,
+        invalid=reader.invalid,
+        repaired=reader.repaired,
+        seconds=time.perf_counter() - start,
+        peak_rss_mb=peak_rss_mb(),
+    )
+    return Ingested(reader.questions.build(), reader.answers.build(), reader.categories,
+                    vectorizer, matrix, report)
+
+
+def main(argv):
+    path = argv[1] if len(argv) > 1 else 'dataset.csv'
+    report = ingest_csv(path).report
+    print(f"{path}: {report.rows} rows, {report.kept} kept, {report.duplicates} duplicates, "
+          f"{report.invalid} invalid, {report.repaired} repaired in {report.seconds:.2f}s")
+    if report.peak_rss_mb is not None:
+        print(f"Peak RSS: {report.peak_rss_mb:.0f} MB")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
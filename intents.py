@@ -0,0 +1,99 @@
+import json
+import logging
+import random
+import re
+from collections import namedtuple
+from datetime import datetime
+
+
+log = logging.getLogger(__name__)
+
+Intent = namedtuple('Intent', ['name', 'keywords', 'responses'])
+
+_WORD = re.compile(r'\w+')
+
+# Used when intents.json is missing or unusable.  intents.json is the only
+# full table; without it every fallback is one of the generic replies
+DEFAULT_INTENTS = {
+    'intents': [],
+    'default': [
+        "That's an interesting question! I'm still learning, but I'll try to help.",
+        "I understand you're asking about that. Could you try rephrasing your question?",
+        "I'm not sure I have the answer to that in my dataset yet.",
+        "That's a great question! My knowledge is based on my training data.",
+        "I'm constantly learning. Could you ask me something else?"
+    ]
+}
+
+
+def load_intents(path='intents.json'):
+    """Load the intent table, falling back to the built-in one"""
+    try:
+        with open(path, 'r') as f:
+            return IntentMatcher(json.load(f))
+    except FileNotFoundError:
+        log.warning("Intents file %s not found. Using the generic replies only...", path)
+    except Exception as e:
+        log.error("Error loading intents from %s: %s", path, e)
+    return IntentMatcher(DEFAULT_INTENTS)
+
+
+class IntentMatcher:
+    """Keyword intents compiled into one phrase lookup table
+
+    Keywords match whole words (or whole word sequences), so "hi" no
+    longer fires on "this".  The input is tokenised once and every n-gram
+    up to the longest keyword is looked up in a dict, so the cost per query
+    depends on the input length, not on the number of intents.  When
+    several intents match, the one listed first in the table wins.
+    """
+
+    def __init__(self, table):
+        self.intents = []
+        self.default_responses = list(table.get('default', []))
+        if not self.default_responses:
+            raise ValueError("Intent table has no default responses")
+        self._phrases = {}
+        self._max_words = 1
+        for priority, spec in enumerate(table['intents']):
+            intent = Intent(spec['name'], tuple(spec['keywords']), tuple(spec['responses']))
+            if not intent.responses:
+                raise ValueError(f"Intent {intent.name!r} has no responses")
+            self.intents.append(intent)
+            for keyword in intent.keywords:
+                words = tuple(_WORD.findall(keyword.lower()))
+                if not words:
+                    continue
+                self._max_words = max(self._max_words, len(words))
+                # Keep the highest-priority intent if two share a keyword
+                self._phrases.setdefault(words, priority)
+
+    def match(self, text):
+        """Return the best matching Intent, or None"""
+        words = _WORD.findall(text.lower())
+        best = None
+        for start in range(len(words)):
+            for length in range(1, min(self._max_words, len(words) - start) + 1):
+                priority = self._phrases.get(tuple(words[start:start + length]))
+                if priority is not None and (best is None or priority < best):
+                    best = priority
+        return self.intents[best] if best is not None else None
+
+    def reply(self, text, now=None):
+        """Return (intent name or None, fallback reply), filling in {time} and {date}
+
+        Only those two placeholders are replaced; any other braces in a
+        response are left as written.
+        """
+        intent = self.match(text)
+        responses = intent.responses if intent is not None else self.default_responses
+        response = random.choice(responses)
+        if '{' in response:
+            now = now or datetime.now()
+            response = (response.replace('{time}', now.strftime('%H:%M:%S'))
+                        .replace('{date}', now.strftime('%A, %B %d, %Y')))
+        return (intent.name if intent is not None else None), response
+
+    def respond(self, text, now=None):
+        """Return a fallback reply for text"""
+        return self.reply(text, now)[1]
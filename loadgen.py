@@ -0,0 +1,119 @@
+"""Local load generator for server.py.
+
+Opens --concurrency keep-alive connections (HTTP or WebSocket) and sends
+--requests chat messages in total, then reports throughput and latency
+percentiles.
+
+Usage:
+    python loadgen.py --port 8000 --concurrency 32 --requests 5000 [--ws]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from server import encode_frame, read_frame
+
+
+MESSAGES = [
+    'hello', 'hi there', 'what is python', 'how to make coffee', 'tell me a joke',
+    'what is machine learning', 'good morning', 'thanks a lot', 'what time is it',
+    'how do I learn coding', 'capital of japan', 'something completely unknown',
+]
+
+
+async def read_http_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n')[1:]:
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    return status, await reader.readexactly(length)
+
+
+async def http_client(host, port, n_requests, messages, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n_requests):
+            body = json.dumps({'message': random.choice(messages)}).encode()
+            request = (f"POST /chat HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+            start = time.perf_counter()
+            writer.write(request)
+            status, _ = await read_http_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def ws_client(host, port, n_requests, messages, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET /ws HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    await reader.readuntil(b'\r\n\r\n')
+    try:
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            writer.write(encode_frame(0x1, random.choice(messages).encode(), mask=os.urandom(4)))
+            _, payload = await read_frame(reader)
+            latencies.append(time.perf_counter() - start)
+            if 'error' in json.loads(payload):
+                errors.append(payload)
+        writer.write(encode_frame(0x8, b'\x03\xe8', mask=os.urandom(4)))
+    finally:
+        writer.close()
+
+
+async def run(host, port, concurrency, n_requests, use_ws, messages):
+    client = ws_client if use_ws else http_client
+    latencies, errors = [], []
+    per_client = [n_requests // concurrency + (i < n_requests % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, n, messages, latencies, errors) for n in per_client if n))
+    elapsed = time.perf_counter() - start
+    ms = np.asarray(latencies) * 1000
+    return {
+        'mode': 'websocket' if use_ws else 'http',
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': elapsed,
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--ws', action='store_true', help='use the WebSocket endpoint')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.host, args.port, args.concurrency, args.requests, args.ws, MESSAGES))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['requests']} {result['mode']} requests, {result['errors']} errors in "
+              f"{result['seconds']:.2f}s: {result['throughput_rps']:.0f} req/s, "
+              f"p50 {result['p50_ms']:.2f}ms p95 {result['p95_ms']:.2f}ms "
+              f"p99 {result['p99_ms']:.2f}ms max {result['max_ms']:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
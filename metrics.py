@@ -0,0 +1,264 @@
+"""Counters, gauges and histograms for the chatbot.
+
+Metrics are defined once below and updated from wherever the work
+happens.  Collection is off by default: every update first checks
+``REGISTRY.enabled`` and returns, so instrumented code costs one attribute
+lookup per call until ``REGISTRY.enable()`` is called.  A snapshot can be
+exported as JSON or in the Prometheus text format, either on demand or
+periodically to a file (see ``start_file_export``).
+
+Set CHATBOT_METRICS=/path/metrics.prom (or .json) to enable collection and
+file export in the GUI; the server also takes --metrics-file and serves
+GET /metrics.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+_NULL_TIMER = nullcontext()
+
+
+class Registry:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._metrics = []
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(self, name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge(self, name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, help, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def reset(self):
+        for metric in self._metrics:
+            metric.reset()
+
+    def snapshot(self):
+        """All metrics as a JSON-serialisable dict"""
+        return {
+            'timestamp': time.time(),
+            'enabled': self.enabled,
+            'metrics': {metric.name: metric.snapshot() for metric in self._metrics},
+        }
+
+    def to_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write a snapshot to path: JSON for *.json, Prometheus text otherwise"""
+        if path.endswith('.json'):
+            text = json.dumps(self.snapshot(), indent=2)
+        else:
+            text = self.to_prometheus()
+        # Atomic replace, so a scraper never reads a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def start_file_export(self, path, interval=15.0):
+        """Enable collection and rewrite path every interval seconds on a daemon thread"""
+        self.enable()
+
+        def export():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write(path)
+                except OSError:
+                    log.exception("Error writing metrics to %s", path)
+
+        thread = threading.Thread(target=export, name='chatbot-metrics', daemon=True)
+        thread.start()
+        return thread
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, help, labelnames):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._values.items(), key=lambda item: tuple(map(str, item[0])))
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def snapshot(self):
+        return [{'labels': dict(zip(self.labelnames, labels)), 'value': value} for labels, value in self._items()]
+
+    def samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in self._items()]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; each label set keeps bucket counts, sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        if not self.registry.enabled:
+            return
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # One count per bucket plus +Inf, then sum and count
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[slot] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, *labels):
+        """Context manager observing the elapsed seconds of its block"""
+        if not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def _cumulative(self, state):
+        counts, total = [], 0
+        for count in state[:-2]:
+            total += count
+            counts.append(total)
+        return counts
+
+    def snapshot(self):
+        result = []
+        for labels, state in self._items():
+            counts = self._cumulative(state)
+            result.append({
+                'labels': dict(zip(self.labelnames, labels)),
+                'buckets': {str(bound): count for bound, count in zip(self.buckets + ('+Inf',), counts)},
+                'sum': state[-2],
+                'count': state[-1],
+            })
+        return result
+
+    def samples(self):
+        lines = []
+        for labels, state in self._items():
+            counts = self._cumulative(state)
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', bound))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {state[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {state[-1]}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'chatbot_stage_seconds', 'Time spent per pipeline stage', ['stage'])
+MATCH_SCORE = REGISTRY.histogram(
+    'chatbot_match_score', 'Cosine similarity of the best dataset match per query', buckets=SCORE_BUCKETS)
+MATCHES = REGISTRY.counter(
+    'chatbot_matches_total', 'Queries whose best match cleared the threshold (hit) or not (miss)', ['result'])
+FALLBACKS = REGISTRY.counter(
+    'chatbot_fallback_total', 'Fallback replies by intent (default when no intent matched)', ['intent'])
+CACHE_REQUESTS = REGISTRY.counter(
+    'chatbot_cache_requests_total', 'Response cache lookups', ['result'])
+TTS_QUEUE_DEPTH = REGISTRY.gauge(
+    'chatbot_tts_queue_depth', 'Utterances waiting for the speech engine')
+TTS_DROPPED = REGISTRY.counter(
+    'chatbot_tts_dropped_total', 'Utterances dropped because speech fell behind')
+STARTUP_SECONDS = REGISTRY.gauge(
+    'chatbot_startup_seconds', 'Seconds from process start to first paint and to a loaded dataset', ['phase'])
+ERRORS = REGISTRY.counter(
+    'chatbot_errors_total', 'Errors caught and logged, by where they happened', ['stage'])
+
+
+def configure_from_env(variable='CHATBOT_METRICS'):
+    """Start file export if the environment names a metrics file; returns the path or None"""
+    path = os.environ.get(variable)
+    if path:
+        REGISTRY.start_file_export(path)
+    return path
@@ -0,0 +1,67 @@
+import logging
+
+from cache import MISSING, ResponseCache
+from intents import load_intents
+from metrics import ERRORS, FALLBACKS, STAGE_SECONDS
+
+
+log = logging.getLogger(__name__)
+
+
+class Responder:
+    """The chatbot's answer pipeline: cached dataset match, then fallback intents
+
+    Shared by the Tk window and the network server; holds no GUI state.
+    """
+
+    def __init__(self, engine, intents=None, cache=None):
+        self.engine = engine
+        self.intents = intents if intents is not None else load_intents('intents.json')
+        if cache is None:
+            cache = ResponseCache(maxsize=1024, ttl=300, key=engine.cache_key)
+        self.cache = cache
+
+    def match(self, user_input):
+        """Best dataset Match for user_input, or None"""
+        # Only dataset matches are cached; the time/date fallbacks are
+        # recomputed on every miss
+        return self.cache.lookup(user_input, self.engine.best_match, self.engine.generation)
+
+    def find_best_match(self, user_input):
+        """Find the best matching question in the dataset"""
+        match = self.match(user_input)
+        return match.answer if match else None
+
+    def respond(self, user_input):
+        """Return (response, category): the dataset category, or the fallback intent name"""
+        with STAGE_SECONDS.time('respond'):
+            return self._finish(user_input, self.match(user_input))
+
+    def generate_response(self, user_input):
+        """Generate response using the dataset"""
+        return self.respond(user_input)[0]
+
+    def generate_responses(self, inputs):
+        """generate_response for many inputs, with one similarity computation for all cache misses"""
+        generation = self.engine.generation
+        matches = [self.cache.get(text, generation) for text in inputs]
+        missed = [i for i, match in enumerate(matches) if match is MISSING]
+        if missed:
+            try:
+                found = self.engine.batch_best_match([inputs[i] for i in missed])
+            except Exception:
+                ERRORS.inc('match')
+                log.exception("Error in similarity matching")
+                found = [None] * len(missed)
+            for i, match in zip(missed, found):
+                matches[i] = match
+                self.cache.put(inputs[i], match, generation)
+        return [self._finish(text, match)[0] for text, match in zip(inputs, matches)]
+
+    def _finish(self, user_input, match):
+        if match:
+            return match.answer, match.category
+        # Fallback responses for common queries (see intents.json)
+        intent, response = self.intents.reply(user_input)
+        FALLBACKS.inc(intent or 'default')
+        return response, intent
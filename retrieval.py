@@ -0,0 +1,422 @@
+import csv
+import logging
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from arena import CategoryColumn
+from artifact import ArtifactError, load_artifact, write_artifact
+from cache import normalize_query, normalizes_queries
+from indexes import BruteForceIndex, top_k
+from ingest import ingest_csv
+from metrics import ERRORS, MATCH_SCORE, MATCHES, STAGE_SECONDS
+
+
+log = logging.getLogger(__name__)
+
+Match = namedtuple('Match', ['index', 'score', 'answer', 'category'])
+
+
+def create_sample_dataset():
+    """Create a sample dataset if file doesn't exist"""
+    data = {
+        'question': [
+            'hello', 'hi', 'how are you', 'what is your name', 'what can you do',
+            'tell me a joke', 'what is python', 'how to learn coding',
+            'what is machine learning', 'what is artificial intelligence',
+            'good morning', 'good afternoon', 'good evening', 'who created you',
+            'what time is it', 'how to make coffee', 'what is photosynthesis',
+            'benefits of exercise', 'book recommendations', 'how to play guitar'
+        ],
+        'answer': [
+            'Hello! How can I assist you today?',
+            'Hi there! What can I help you with?',
+            "I'm doing great, thank you! How can I assist you?",
+            "I'm an AI chatbot designed to help with your questions.",
+            'I can answer questions, provide information, help with calculations, and more!',
+            "Why don't scientists trust atoms? Because they make up everything!",
+            'Python is a high-level programming language known for its simplicity and readability.',
+            'Start with basic programming concepts, practice regularly, and build small projects.',
+            'Machine learning is a subset of AI that enables computers to learn from data.',
+            'AI is the simulation of human intelligence in machines.',
+            'Good morning! How are you doing today?',
+            'Good afternoon! How can I help you?',
+            'Good evening! What would you like to know?',
+            'I was created by a developer to assist with various tasks.',
+            'I cannot access real-time information, but you can check your device clock.',
+            'Boil water, add coffee grounds, pour hot water, and let it brew.',
+            'Photosynthesis is how plants convert sunlight into energy.',
+            'Exercise improves health, boosts mood, and increases energy levels.',
+            'I recommend "Atomic Habits", "The Alchemist", and "Sapiens".',
+            'Start with basic chords, practice regularly, and learn simple songs.'
+        ],
+        'category': [
+            'greeting', 'greeting', 'greeting', 'about', 'about',
+            'fun', 'programming', 'advice', 'technology', 'technology',
+            'greeting', 'greeting', 'greeting', 'about', 'information',
+            'cooking', 'science', 'health', 'entertainment', 'hobbies'
+        ]
+    }
+    return data
+
+
+# An immutable view of the index. Queries read whichever snapshot is current,
+# so writers can swap in a new one without blocking them.
+_Snapshot = namedtuple('_Snapshot', [
+    'vectorizer', 'matrix', 'index', 'base_rows', 'delta_ids', 'delta_index', 'exclude',
+])
+
+
+class RetrievalEngine:
+    """TF-IDF question matcher with no GUI or audio dependencies
+
+    ``index_factory`` is called with the fitted TF-IDF matrix and must
+    return an object with a ``search(queries, k, exclude)`` method (see
+    indexes.py).  Extra keyword arguments are passed to TfidfVectorizer.
+
+    Rows added, updated or deleted after ``fit`` go into a small delta
+    segment vectorised with the current vocabulary and IDF weights, and the
+    superseded base rows are masked out.  Once the number of changes
+    exceeds ``compact_ratio`` of the fitted rows, a background compaction
+    refits the vectorizer (refreshing IDF) over all live rows and swaps the
+    new index in.  Row ids are stable: deleted rows keep their id.
+    ``generation`` goes up on every change that can alter a query result.
+    """
+
+    def __init__(self, threshold=0.3, index_factory=BruteForceIndex, compact_ratio=0.1,
+                 **vectorizer_params):
+        self.threshold = threshold
+        self.index_factory = index_factory
+        self.compact_ratio = compact_ratio
+        self.vectorizer_params = vectorizer_params
+        self._normalize_keys = normalizes_queries(vectorizer_params)
+        self.questions = []
+        self.answers = []
+        self.categories = []
+        self.deleted = set()
+        self.generation = 0
+        self._snapshot = None
+        self._delta_rows = {}
+        self._base_deleted = frozenset()
+        self._touched = set()
+        self._write_lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compaction = None
+
+    @classmethod
+    def from_csv(cls, path='dataset.csv', **kwargs):
+        """Build an engine from a CSV file and fit it"""
+        engine = cls(**kwargs)
+        engine.load(path)
+        return engine
+
+    @classmethod
+    def from_artifact(cls, path, source_path=None, **kwargs):
+        """Open an engine over a memory-mapped artifact written by save()
+
+        Raises ArtifactError if source_path is given and has changed since
+        the artifact was built.
+        """
+        header, vectorizer, matrix, records = load_artifact(path, source_path)
+        engine = cls(**{**header['vectorizer_params'], **kwargs})
+        engine.questions = records['questions']
+        engine.answers = records['answers']
+        engine.categories = records['categories']
+        engine.deleted = records['deleted']
+        deleted = frozenset(engine.deleted)
+        engine._publish(vectorizer, matrix, engine.index_factory(matrix), deleted)
+        return engine
+
+    def save(self, path, source_path=None):
+        """Write the fitted model to a versioned artifact file
+
+        Waits for a running compaction, then folds any delta rows and
+        deletions into the base index first, since only the base is saved.
+        """
+        with self._compact_lock, self._write_lock:
+            if self._delta_rows or self.deleted - self._base_deleted:
+                self._compact()
+            return write_artifact(self, path, source_path)
+
+    def cache_key(self, text):
+        """Key for caching the match of text
+
+        The normalised query under the default tokenizer settings, else the
+        text itself: with e.g. char n-grams or case kept, normalising would
+        share one cache entry between queries that score differently.
+        """
+        if self._normalize_keys:
+            return normalize_query(text)
+        return text
+
+    def __len__(self):
+        return len(self.questions) - len(self.deleted)
+
+    @property
+    def vectorizer(self):
+        return self._snapshot.vectorizer
+
+    @property
+    def tfidf_matrix(self):
+        return self._snapshot.matrix
+
+    @property
+    def pending_changes(self):
+        """Rows changed since the last refit"""
+        return len(self._touched)
+
+    def load(self, path='dataset.csv'):
+        """Stream the CSV into compact columns and fit the index in the same pass
+
+        Falls back to the sample dataset when the file is missing or
+        unusable.  Returns the IngestReport, or None for the fallback.
+        """
+        try:
+            with STAGE_SECONDS.time('load'):
+                ingested = ingest_csv(path, self.vectorizer_params)
+        except FileNotFoundError:
+            log.warning("Dataset file %s not found. Creating sample dataset...", path)
+        except (ValueError, csv.Error) as e:
+            ERRORS.inc('load')
+            log.error("Error loading dataset %s: %s", path, e)
+        else:
+            report = ingested.report
+            log.info("Dataset loaded with %d records (%d duplicates and %d invalid rows skipped, %d repaired)",
+                     report.kept, report.duplicates, report.invalid, report.repaired)
+            with self._compact_lock, self._write_lock:
+                self.questions = ingested.questions
+                self.answers = ingested.answers
+                self.categories = ingested.categories
+                self.deleted = set()
+                self._delta_rows = {}
+                self._touched = set()
+                matrix = ingested.matrix
+                self._publish(ingested.vectorizer, matrix, self.index_factory(matrix), frozenset())
+            return report
+        self.fit(create_sample_dataset())
+        return None
+
+    def rows(self):
+        """Yield (index, question, answer, category) for every live row"""
+        for idx in range(len(self.questions)):
+            if idx not in self.deleted:
+                yield idx, self.questions[idx], self.answers[idx], self.categories[idx]
+
+    def category_names(self):
+        return sorted({category for _, _, _, category in self.rows()})
+
+    def fit(self, dataset=None):
+        """Setup TF-IDF vectorizer for similarity matching"""
+        # Wait out a running compaction: it was built from the old records
+        # and would otherwise publish its snapshot over this one
+        with self._compact_lock, self._write_lock:
+            if dataset is not None:
+                self._set_records(dataset)
+            try:
+                self._touched = set()
+                self._delta_rows = {}
+                with STAGE_SECONDS.time('fit'):
+                    self._publish(*self._build(len(self.questions), frozenset(self.deleted)))
+            except Exception:
+                ERRORS.inc('fit')
+                log.exception("Error setting up similarity model")
+
+    def add(self, question, answer, category):
+        """Append a row in O(1) amortised time and return its id"""
+        with self._write_lock:
+            idx = len(self.questions)
+            self.questions.append(question)
+            self.answers.append(answer)
+            self.categories.append(category)
+            self._delta_rows[idx] = self._snapshot.vectorizer.transform([question])
+            self._changed(idx)
+            return idx
+
+    def update(self, idx, question=None, answer=None, category=None):
+        """Replace fields of an existing row; a new question is re-vectorised"""
+        with self._write_lock:
+            self._check_live(idx)
+            if answer is not None:
+                self.answers[idx] = answer
+            if category is not None:
+                self.categories[idx] = category
+            self.generation += 1
+            if question is not None:
+                self.questions[idx] = question
+                self._delta_rows[idx] = self._snapshot.vectorizer.transform([question])
+                self._changed(idx)
+
+    def delete(self, idx):
+        """Soft-delete a row so it is no longer returned"""
+        with self._write_lock:
+            self._check_live(idx)
+            self.deleted.add(idx)
+            self._delta_rows.pop(idx, None)
+            self._changed(idx)
+
+    def compact(self):
+        """Refit the vectorizer over all live rows and fold the delta into the base index
+
+        Queries and writes keep being served from the old snapshot while the
+        new one is built; writes made in the meantime are replayed on top.
+        """
+        with self._compact_lock:
+            self._compact()
+
+    def _compact(self):
+        """compact() with _compact_lock held"""
+        with self._write_lock:
+            n_rows = len(self.questions)
+            deleted = frozenset(self.deleted)
+            self._touched = set()
+        with STAGE_SECONDS.time('compact'):
+            built = self._build(n_rows, deleted)
+        vectorizer = built[0]
+        with self._write_lock:
+            self._delta_rows = {
+                idx: vectorizer.transform([self.questions[idx]])
+                for idx in self._touched if idx not in self.deleted
+            }
+            self._publish(*built)
+
+    def batch_top_k(self, queries, k=3, chunk_size=1024):
+        """Return the k best matches for every query as lists of Match tuples
+
+        All queries are vectorised together and handed to the index one
+        chunk at a time; only rows sharing a term with the query are
+        considered, and the top k are picked with a partial selection.
+        """
+        snapshot = self._snapshot
+        queries = list(queries)
+        results = []
+        with STAGE_SECONDS.time('match'):
+            self._search(snapshot, queries, k, chunk_size, results)
+        return results
+
+    def _search(self, snapshot, queries, k, chunk_size, results):
+        for start in range(0, len(queries), chunk_size):
+            chunk = snapshot.vectorizer.transform(queries[start:start + chunk_size])
+            found = snapshot.index.search(chunk, k, snapshot.exclude)
+            if snapshot.delta_index is not None:
+                delta = snapshot.delta_index.search(chunk, k)
+                found = [
+                    top_k(np.concatenate([idx, snapshot.delta_ids[d_idx]]), np.concatenate([sims, d_sims]), k)
+                    for (idx, sims), (d_idx, d_sims) in zip(found, delta)
+                ]
+            for idx, sims in found:
+                results.append([self._result(i, s) for i, s in zip(idx, sims)])
+
+    def batch_best_match(self, queries, chunk_size=1024):
+        """Return the best Match (or None below the threshold) for every query"""
+        best = []
+        for matches in self.batch_top_k(queries, k=1, chunk_size=chunk_size):
+            score = matches[0].score if matches else 0.0
+            MATCH_SCORE.observe(score)
+            if score > self.threshold:
+                MATCHES.inc('hit')
+                best.append(matches[0])
+            else:
+                MATCHES.inc('miss')
+                best.append(None)
+        return best
+
+    def batch_query(self, queries, chunk_size=1024):
+        """Return the best answer (or None) for every query"""
+        return [match.answer if match else None for match in self.batch_best_match(queries, chunk_size)]
+
+    def top_k(self, user_input, k=3):
+        """Return the k most similar rows as Match tuples"""
+        return self.batch_top_k([user_input], k=k)[0]
+
+    def best_match(self, user_input):
+        """Find the best matching row, or None if nothing clears the threshold"""
+        try:
+            return self.batch_best_match([user_input])[0]
+        except Exception:
+            ERRORS.inc('match')
+            log.exception("Error in similarity matching")
+            return None
+
+    def query(self, user_input):
+        """Find the best matching answer, or None if nothing clears the threshold"""
+        match = self.best_match(user_input)
+        return match.answer if match else None
+
+    def _set_records(self, dataset):
+        """dataset: a DataFrame or any mapping of column name -> values"""
+        self.questions = [str(q) for q in dataset['question']]
+        self.answers = [str(a) for a in dataset['answer']]
+        self.categories = CategoryColumn(str(c) for c in dataset['category'])
+        self.deleted = set()
+        self._delta_rows = {}
+
+    def _build(self, n_rows, deleted):
+        """Fit a fresh vectorizer on live rows and index the first n_rows rows"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        live = [q for idx, q in enumerate(self.questions[:n_rows]) if idx not in deleted]
+        if not live and self._snapshot is not None:
+            # Every row is deleted and there is nothing to fit a vocabulary
+            # on: keep the current one over an empty matrix
+            vectorizer = self._snapshot.vectorizer
+            matrix = sp.csr_matrix((n_rows, vectorizer.transform(['']).shape[1]))
+            return vectorizer, matrix, self.index_factory(matrix), deleted
+        vectorizer = TfidfVectorizer(**self.vectorizer_params)
+        vectorizer.fit(live)
+        matrix = vectorizer.transform(self.questions[:n_rows])
+        if deleted:
+            # Keep row ids stable: deleted rows stay in the matrix but empty
+            keep = np.ones(n_rows)
+            keep[list(deleted)] = 0
+            matrix = sp.diags(keep) @ matrix
+            matrix.eliminate_zeros()
+        return vectorizer, matrix, self.index_factory(matrix), deleted
+
+    def _publish(self, vectorizer, matrix, index, base_deleted):
+        self._base_deleted = base_deleted
+        delta_ids = np.array(sorted(self._delta_rows), dtype=np.int64)
+        delta_index = None
+        if len(delta_ids):
+            delta_index = BruteForceIndex(sp.vstack([self._delta_rows[idx] for idx in delta_ids]).tocsr())
+        exclude = np.array(sorted((self.deleted - base_deleted) | set(self._delta_rows)), dtype=np.int64)
+        self._snapshot = _Snapshot(vectorizer, matrix, index, matrix.shape[0], delta_ids, delta_index, exclude)
+        self.generation += 1
+
+    def _changed(self, idx):
+        self._touched.add(idx)
+        snapshot = self._snapshot
+        self._publish(snapshot.vectorizer, snapshot.matrix, snapshot.index, self._base_deleted)
+        if len(self._touched) > self.compact_ratio * max(snapshot.base_rows, 1):
+            self._schedule_compaction()
+
+    def _schedule_compaction(self):
+        if self._compaction is None or not self._compaction.is_alive():
+            self._compaction = threading.Thread(target=self.compact, daemon=True)
+            self._compaction.start()
+
+    def _check_live(self, idx):
+        if not 0 <= idx < len(self.questions) or idx in self.deleted:
+            raise KeyError(f"No row with index {idx}")
+
+    def _result(self, idx, score):
+        return Match(int(idx), float(score), self.answers[idx], self.categories[idx])
+
+
+def load_engine(csv_path='dataset.csv', model_path='dataset.model', **kwargs):
+    """Open the model artifact if it matches csv_path, else fit from the CSV and save one"""
+    if model_path and os.path.exists(model_path):
+        try:
+            return RetrievalEngine.from_artifact(model_path, csv_path, **kwargs)
+        except (ArtifactError, OSError, ValueError) as e:
+            log.info("Rebuilding model: %s", e)
+    engine = RetrievalEngine.from_csv(csv_path, **kwargs)
+    if model_path and os.path.exists(csv_path):
+        try:
+            engine.save(model_path, csv_path)
+        except (ArtifactError, OSError):
+            ERRORS.inc('save_model')
+            log.exception("Error saving model to %s", model_path)
+    return engine
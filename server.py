@@ -0,0 +1,333 @@
+"""Headless network server for the chatbot.
+
+Endpoints:
+    POST /chat     {"message": "..."}  ->  {"response": "..."}
+    GET  /health   ->  {"status": "ok", "records": N}
+    GET  /metrics  Prometheus text (collection is on with --metrics-file,
+                   or CHATBOT_METRICS set)
+    GET  /ws       WebSocket; each text frame is a message, each reply is
+                   a JSON text frame {"response": "..."}
+
+Concurrent requests are collected for up to --max-delay-ms (or until
+--max-batch are waiting) and answered with one similarity computation.
+With --processes N, N worker processes share the listening port
+(SO_REUSEPORT) and memory-map the same model artifact.
+
+Usage:
+    python server.py --port 8000 --processes 4
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import struct
+
+from metrics import ERRORS, REGISTRY, STAGE_SECONDS
+from responder import Responder
+from retrieval import RetrievalEngine, load_engine
+
+
+WS_GUID = '258EAFA5-E914-47A5-95CA-C5AB0DC11B85'
+MAX_BODY = 64 * 1024
+WS_CLOSE_TOO_BIG = 1009
+log = logging.getLogger(__name__)
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests into batched generate_responses calls
+
+    Batches run one at a time on a worker thread, so requests arriving
+    while one is being scored simply make the next batch bigger.
+    """
+
+    def __init__(self, responder, max_batch=64, max_delay=0.002, max_queue=4096):
+        self.responder = responder
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, message):
+        """Return the reply for message; raises asyncio.QueueFull when overloaded"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((message, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            batch = [(message, future) for message, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            try:
+                replies = await loop.run_in_executor(None, self._answer, [message for message, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), reply in zip(batch, replies):
+                if not future.done():
+                    future.set_result(reply)
+
+    def _answer(self, messages):
+        with STAGE_SECONDS.time('batch'):
+            return self.responder.generate_responses(messages)
+
+
+class ChatServer:
+    def __init__(self, responder, max_batch=64, max_delay=0.002):
+        self.responder = responder
+        self.batcher = MicroBatcher(responder, max_batch=max_batch, max_delay=max_delay)
+
+    async def serve(self, host, port, reuse_port=False):
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port, reuse_port=reuse_port)
+        log.info("[%d] Serving on http://%s:%d", os.getpid(), host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                    await self.handle_websocket(reader, writer, headers)
+                    break
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if path == '/metrics':
+                    write_response(writer, 200, REGISTRY.to_prometheus(), keep_alive,
+                                   content_type='text/plain; version=0.0.4')
+                else:
+                    status, payload = await self.route(method, path, body)
+                    write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            write_response(writer, 413 if 'too large' in str(e) else 400, {'error': str(e)}, False)
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok', 'records': len(self.responder.engine)}
+        if path != '/chat':
+            return 404, {'error': 'not found'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        try:
+            message = json.loads(body)['message']
+            if not isinstance(message, str) or not message.strip():
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            return 400, {'error': 'expected JSON body {"message": "..."}'}
+        try:
+            return 200, {'response': await self.batcher.submit(message)}
+        except asyncio.QueueFull:
+            return 503, {'error': 'server busy'}
+        except Exception:
+            ERRORS.inc('server')
+            log.exception("Error answering %r", message)
+            return 500, {'error': 'internal error'}
+
+    async def handle_websocket(self, reader, writer, headers):
+        key = headers.get('sec-websocket-key')
+        if not key:
+            write_response(writer, 400, {'error': 'missing Sec-WebSocket-Key'}, False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        await writer.drain()
+
+        while True:
+            try:
+                opcode, payload = await read_frame(reader)
+            except ValueError:
+                # Past the upgrade an HTTP 413 would corrupt the stream:
+                # close with 1009 (message too big) instead
+                writer.write(encode_frame(0x8, struct.pack('!H', WS_CLOSE_TOO_BIG)))
+                await writer.drain()
+                return
+            if opcode == 0x8:
+                writer.write(encode_frame(0x8, payload[:2]))
+                await writer.drain()
+                return
+            if opcode == 0x9:
+                writer.write(encode_frame(0xA, payload))
+            elif opcode == 0x1:
+                message = payload.decode('utf-8', errors='replace')
+                try:
+                    reply = {'response': await self.batcher.submit(message)}
+                except asyncio.QueueFull:
+                    reply = {'error': 'server busy'}
+                except Exception:
+                    ERRORS.inc('server')
+                    log.exception("Error answering %r", message)
+                    reply = {'error': 'internal error'}
+                writer.write(encode_frame(0x1, json.dumps(reply).encode()))
+            await writer.drain()
+
+
+async def read_request(reader):
+    """Parse one HTTP/1.1 request; returns None on a clean end of stream"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise
+    except asyncio.LimitOverrunError:
+        raise ValueError("request header too large")
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise ValueError("malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0) or 0)
+    if length > MAX_BODY:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target.split('?', 1)[0], headers, body
+
+
+def write_response(writer, status, payload, keep_alive=True, content_type='application/json'):
+    """Send payload as JSON, or as-is when it is already a string"""
+    body = (payload if isinstance(payload, str) else json.dumps(payload)).encode()
+    writer.write((
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    ).encode() + body)
+
+
+async def read_frame(reader):
+    """Read one (unfragmented) client WebSocket frame: returns (opcode, payload)"""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    if length > MAX_BODY:
+        raise ValueError("frame too large")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+def encode_frame(opcode, payload, mask=None):
+    """Encode a single final frame; clients must pass a 4-byte mask"""
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    if len(payload) < 126:
+        header += bytes([mask_bit | len(payload)])
+    elif len(payload) < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack('!H', len(payload))
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack('!Q', len(payload))
+    if mask:
+        payload = mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return header + payload
+
+
+def run_worker(host, port, model_path, csv_path, max_batch, max_delay, reuse_port, metrics_file=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    if metrics_file:
+        if reuse_port:
+            # One file per worker process; /metrics shows whichever worker answered
+            root, ext = os.path.splitext(metrics_file)
+            metrics_file = f"{root}.{os.getpid()}{ext}"
+        REGISTRY.start_file_export(metrics_file)
+    if reuse_port:
+        engine = RetrievalEngine.from_artifact(model_path)
+    else:
+        engine = load_engine(csv_path, model_path)
+    # Pay for the vectorizer's first use (and its sklearn import) before
+    # serving rather than on the first request
+    engine.top_k('warm up', k=1)
+    server = ChatServer(Responder(engine), max_batch=max_batch, max_delay=max_delay)
+    try:
+        asyncio.run(server.serve(host, port, reuse_port=reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--csv', default='dataset.csv')
+    parser.add_argument('--model', default='dataset.model')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    parser.add_argument('--metrics-file', default=os.environ.get('CHATBOT_METRICS'),
+                        help='collect metrics and write them here periodically (.json or Prometheus text)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    worker_args = (args.host, args.port, args.model, args.csv, args.max_batch, args.max_delay_ms / 1000)
+    if args.processes <= 1:
+        run_worker(*worker_args, reuse_port=False, metrics_file=args.metrics_file)
+        return
+
+    # Build (or validate) the artifact once; every worker then maps the same file
+    load_engine(args.csv, args.model)
+    if not os.path.exists(args.model):
+        parser.error(f"--processes needs a model artifact; run: python artifact.py build {args.csv} {args.model}")
+    workers = [multiprocessing.Process(target=run_worker, args=worker_args + (True, args.metrics_file))
+               for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import bisect
+import re
+from collections import defaultdict
+from itertools import islice
+
+
+_WORD = re.compile(r'\w+')
+
+
+class SuggestionIndex:
+    """Prefix index over dataset questions for the live suggestions box
+
+    Two structures are kept: the lower-cased questions in sorted order, so
+    questions that start with the typed text are found by binary search,
+    and a word -> row ids map over a sorted vocabulary, so the typed words
+    (the last one as a prefix) narrow the candidates before the substring
+    check.  Results are ranked: question prefix first, then matches at a
+    word boundary, then anywhere; shorter questions win ties.
+    """
+
+    def __init__(self, max_candidates=200):
+        self.max_candidates = max_candidates
+        self._questions = {}
+        self._sorted = []
+        self._vocabulary = []
+        self._postings = defaultdict(set)
+
+    @classmethod
+    def from_rows(cls, rows, **kwargs):
+        """Build from (index, question, ...) tuples such as RetrievalEngine.rows()"""
+        index = cls(**kwargs)
+        for row in rows:
+            idx, question = row[0], row[1]
+            lowered = question.lower()
+            index._questions[idx] = (question, lowered)
+            for word in set(_WORD.findall(lowered)):
+                index._postings[word].add(idx)
+        index._sorted = sorted((lowered, idx) for idx, (_, lowered) in index._questions.items())
+        index._vocabulary = sorted(index._postings)
+        return index
+
+    def __len__(self):
+        return len(self._questions)
+
+    def add(self, idx, question):
+        if idx in self._questions:
+            self.remove(idx)
+        lowered = question.lower()
+        self._questions[idx] = (question, lowered)
+        bisect.insort(self._sorted, (lowered, idx))
+        for word in set(_WORD.findall(lowered)):
+            if word not in self._postings:
+                bisect.insort(self._vocabulary, word)
+            self._postings[word].add(idx)
+
+    def remove(self, idx):
+        question, lowered = self._questions.pop(idx)
+        pos = bisect.bisect_left(self._sorted, (lowered, idx))
+        del self._sorted[pos]
+        for word in set(_WORD.findall(lowered)):
+            ids = self._postings[word]
+            ids.discard(idx)
+            if not ids:
+                del self._postings[word]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+
+    def suggest(self, query, limit=3):
+        """Return up to limit questions containing query, best first"""
+        query = query.lower()
+        if not query.strip():
+            return []
+        candidates = set(self._prefix_rows(query))
+        if len(candidates) < limit:
+            # Prefix matches always outrank the rest, so only look further when short
+            candidates.update(self._word_rows(query))
+
+        ranked = []
+        for idx in candidates:
+            question, lowered = self._questions[idx]
+            pos = lowered.find(query)
+            if pos < 0:
+                continue
+            if pos == 0:
+                tier = 0
+            elif not lowered[pos - 1].isalnum():
+                tier = 1
+            else:
+                tier = 2
+            ranked.append((tier, len(lowered), idx, question))
+        ranked.sort()
+        suggestions, seen = [], set()
+        for _, _, _, question in ranked:
+            if question not in seen:
+                seen.add(question)
+                suggestions.append(question)
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+
+    def _prefix_rows(self, query):
+        start = bisect.bisect_left(self._sorted, (query,))
+        for lowered, idx in self._sorted[start:start + self.max_candidates]:
+            if not lowered.startswith(query):
+                break
+            yield idx
+
+    def _word_rows(self, query):
+        words = _WORD.findall(query)
+        if not words:
+            return set()
+        # Every word but the last is complete unless the user is still typing it
+        complete = words if query[-1] == ' ' else words[:-1]
+        partial = None if query[-1] == ' ' else words[-1]
+        # Narrow by every typed word before capping, smallest posting set
+        # first, so the cap never drops rows that contain all of them
+        known = sorted((self._postings.get(word, set()) for word in set(complete)), key=len)
+        rows = None
+        if known:
+            rows = set(known[0])
+            for ids in known[1:]:
+                rows &= ids
+                if not rows:
+                    return rows
+        if partial is not None:
+            start = bisect.bisect_left(self._vocabulary, partial)
+            end = bisect.bisect_left(self._vocabulary, partial + '\U0010ffff', start)
+            if rows is not None and end - start > self.max_candidates:
+                # A short prefix of a common word: collecting its rows would
+                # cost more than checking the candidates we have directly
+                return set(islice((idx for idx in rows if query in self._questions[idx][1]),
+                                  self.max_candidates))
+            prefixed = set()
+            for word in islice(self._vocabulary, start, end):
+                prefixed.update(self._postings[word])
+                # Without complete words any of these rows will do
+                if rows is None and len(prefixed) >= self.max_candidates:
+                    break
+            rows = prefixed if rows is None else rows & prefixed
+        return set(islice(rows, self.max_candidates))
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from indexes import BruteForceIndex, InvertedIndex
+
+
+def random_matrix(rng, rows, cols, density):
+    # Multiples of 1/4 keep every sum exact, so equal scores are true ties
+    # in both indexes and the tie-break order can be compared directly
+    matrix = sp.random(rows, cols, density=density, format='csr', random_state=rng,
+                       data_rvs=lambda n: rng.integers(1, 5, n) / 4)
+    return sp.vstack([matrix, matrix[:rows // 4]]).tocsr()
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('with_exclude', [False, True])
+def test_inverted_index_at_full_recall_matches_brute_force(seed, with_exclude):
+    rng = np.random.default_rng(seed)
+    matrix = random_matrix(rng, 200, 40, 0.1)
+    queries = random_matrix(rng, 30, 40, 0.15)
+    exclude = np.sort(rng.choice(matrix.shape[0], 40, replace=False)) if with_exclude else None
+
+    for k in (1, 3, 10):
+        expected = BruteForceIndex(matrix).search(queries, k, exclude)
+        found = InvertedIndex(matrix, recall=1.0).search(queries, k, exclude)
+        for (exp_idx, exp_scores), (idx, scores) in zip(expected, found):
+            assert list(idx) == list(exp_idx)
+            assert list(scores) == list(exp_scores)
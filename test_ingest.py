@@ -0,0 +1,19 @@
+from ingest import ingest_csv
+
+
+def write_csv(tmp_path, rows):
+    path = tmp_path / 'dataset.csv'
+    path.write_text('question,answer,category\n' + ''.join(f'{q},{a},{c}\n' for q, a, c in rows))
+    return str(path)
+
+
+def test_duplicates_depend_on_the_tokenizer_settings(tmp_path):
+    path = write_csv(tmp_path, [
+        ('what is c++', 'A language with classes.', 'programming'),
+        ('what is c#', 'A .NET language.', 'programming'),
+        ('What is C++?', 'Same question again.', 'programming'),
+    ])
+    # The default word analyzer sees all three as "what is"
+    assert ingest_csv(path).report.kept == 1
+    ingested = ingest_csv(path, {'analyzer': 'char_wb', 'ngram_range': (2, 4)})
+    assert list(ingested.answers) == ['A language with classes.', 'A .NET language.', 'Same question again.']
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+
+from intents import IntentMatcher
+
+
+def test_only_time_and_date_placeholders_are_filled():
+    matcher = IntentMatcher({
+        'intents': [{'name': 'goodbye', 'keywords': ['bye'], 'responses': ['Bye {name}, it is {time}']}],
+        'default': ['Sorry?'],
+    })
+    now = datetime(2024, 1, 2, 3, 4, 5)
+    assert matcher.reply('bye', now) == ('goodbye', 'Bye {name}, it is 03:04:05')
+
+
+@pytest.mark.parametrize('table', [
+    {'intents': []},
+    {'intents': [{'name': 'empty', 'keywords': ['x'], 'responses': []}], 'default': ['Sorry?']},
+])
+def test_table_without_responses_is_rejected(table):
+    with pytest.raises(ValueError):
+        IntentMatcher(table)
@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+from artifact import ArtifactError
+from retrieval import RetrievalEngine, create_sample_dataset, load_engine
+
+
+def fitted_engine(**kwargs):
+    engine = RetrievalEngine(**kwargs)
+    engine.fit(create_sample_dataset())
+    return engine
+
+
+def hold_compaction(engine):
+    """Make the next build pause once it is done until the returned event is set
+
+    Returns (started, release): started is set when a build has finished
+    and is waiting to be published.
+    """
+    build = engine._build
+    started, release = threading.Event(), threading.Event()
+
+    def paused_build(*args):
+        built = build(*args)
+        started.set()
+        release.wait()
+        return built
+
+    engine._build = paused_build
+    return started, release
+
+
+def run_in_thread(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_fit_is_not_overwritten_by_running_compaction():
+    engine = fitted_engine()
+    started, release = hold_compaction(engine)
+    compaction = run_in_thread(engine.compact)
+    assert started.wait(5)
+
+    dataset = {'question': ['what is rust'], 'answer': ['A systems language.'], 'category': ['programming']}
+    fit = run_in_thread(engine.fit, dataset)
+    release.set()
+    compaction.join(5)
+    fit.join(5)
+    assert not compaction.is_alive() and not fit.is_alive()
+
+    assert engine.tfidf_matrix.shape[0] == len(engine.questions) == 1
+    assert engine.query('what is rust') == 'A systems language.'
+
+
+def test_save_during_compaction_waits_and_keeps_new_rows(tmp_path):
+    engine = fitted_engine(compact_ratio=1000)
+    started, release = hold_compaction(engine)
+    compaction = run_in_thread(engine.compact)
+    assert started.wait(5)
+
+    # Added while the compaction is building: replayed into the delta
+    idx = engine.add('how to bake bread', 'Mix flour, water, yeast and salt, then bake.', 'cooking')
+    path = tmp_path / 'engine.model'
+    save = run_in_thread(engine.save, str(path))
+    release.set()
+    save.join(5)
+    compaction.join(5)
+    assert not save.is_alive() and not compaction.is_alive()
+
+    loaded = RetrievalEngine.from_artifact(str(path))
+    assert loaded.tfidf_matrix.shape[0] == len(loaded.questions) == len(engine.questions)
+    assert loaded.best_match('how to bake bread').index == idx
+
+
+def test_cache_key_normalises_only_under_default_tokenizer():
+    assert fitted_engine().cache_key('Hello,  World!') == 'hello world'
+    for params in ({'analyzer': 'char_wb', 'ngram_range': (2, 4)}, {'lowercase': False}):
+        assert fitted_engine(**params).cache_key('Hello,  World!') == 'Hello,  World!'
+
+
+def test_compacting_with_every_row_deleted(tmp_path):
+    engine = fitted_engine(compact_ratio=1000)
+    for idx in range(len(engine.questions)):
+        engine.delete(idx)
+    engine.compact()
+    assert len(engine) == 0
+    assert engine.best_match('hello') is None
+
+    path = str(tmp_path / 'engine.model')
+    engine.save(path)
+    assert len(RetrievalEngine.from_artifact(path)) == 0
+
+    # The vocabulary is kept, so new rows are still matched
+    idx = engine.add('what is rust', 'A systems language.', 'programming')
+    assert engine.best_match('what is rust').index == idx
+
+
+def test_artifact_without_idf(tmp_path):
+    engine = fitted_engine(use_idf=False)
+    path = str(tmp_path / 'engine.model')
+    engine.save(path)
+    loaded = RetrievalEngine.from_artifact(path)
+    assert loaded.best_match('how to play guitar').index == engine.best_match('how to play guitar').index
+
+
+def test_unsaveable_settings_still_load(tmp_path):
+    engine = fitted_engine(tokenizer=str.split, token_pattern=None)
+    with pytest.raises(ArtifactError):
+        engine.save(str(tmp_path / 'engine.model'))
+
+    csv_path = tmp_path / 'dataset.csv'
+    csv_path.write_text('question,answer,category\nwhat is rust,A systems language.,programming\n')
+    engine = load_engine(str(csv_path), str(tmp_path / 'dataset.model'), tokenizer=str.split, token_pattern=None)
+    assert engine.query('what is rust') == 'A systems language.'
@@ -0,0 +1,8 @@
+from suggestions import SuggestionIndex
+
+
+def test_rare_phrase_is_found_behind_a_common_word():
+    rows = [(i, f"question {i} about guitar w{i}") for i in range(1000)]
+    index = SuggestionIndex.from_rows(rows, max_candidates=20)
+    assert index.suggest('guitar w999') == ['question 999 about guitar w999']
+    assert len(index.suggest('guitar w')) == 3
@@ -0,0 +1,174 @@
+import threading
+import tkinter as tk
+from datetime import datetime
+
+
+class Transcript:
+    """Batched, windowed rendering of a conversation into a Tk Text widget
+
+    ``add`` may be called from any thread; messages are queued and written
+    with a single insert once per frame instead of one widget update each.
+    The widget only ever holds a window of about ``window`` messages: the
+    full conversation stays in ``entries``, older messages are rendered a
+    page at a time when the view is scrolled to the top, and the far end
+    is dropped again so a long session or a long saved chat never turns
+    into one huge text buffer.
+    """
+
+    def __init__(self, widget, window=300, page=100, frame_ms=16):
+        self.widget = widget
+        self.window = window
+        self.page = page
+        self.frame_ms = frame_ms
+        self.entries = []
+        # entries[self._first:self._last] are in the widget, with the number
+        # of text lines each one takes in self._lines
+        self._first = 0
+        self._last = 0
+        self._lines = []
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_job = None
+        self._scroll_job = None
+
+        widget.tag_config('user', foreground='#4CAF50')
+        widget.tag_config('bot', foreground='#2196F3')
+        widget.tag_config('timestamp', foreground='#888888')
+        # ScrolledText wires its scrollbar through yscrollcommand; wrap it
+        # to notice when the view reaches either end of the window
+        self._scrollbar = getattr(widget, 'vbar', None)
+        widget.config(yscrollcommand=self._on_scroll)
+
+    def add(self, message, tag, timestamp=True):
+        """Queue a message for the next frame; safe to call from worker threads"""
+        stamp = f"[{datetime.now().strftime('%H:%M:%S')}] " if timestamp else ''
+        with self._lock:
+            self._pending.append((stamp, message, tag))
+            if self._flush_job is None:
+                self._flush_job = self.widget.after(self.frame_ms, self._flush)
+
+    def replace(self, messages):
+        """Show a saved conversation ('user: ...' / 'bot: ...' strings)"""
+        self._drop_pending()
+        self.entries = [('', message, 'user' if message.startswith('user:') else 'bot')
+                        for message in messages]
+        self._render_tail()
+
+    def clear(self):
+        self._drop_pending()
+        self.entries = []
+        self._render_tail()
+
+    def _drop_pending(self):
+        with self._lock:
+            self._pending = []
+            if self._flush_job is not None:
+                self.widget.after_cancel(self._flush_job)
+                self._flush_job = None
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._flush_job = None
+        if not batch:
+            return
+        following = self._last == len(self.entries)
+        self.entries.extend(batch)
+        if not following:
+            # Scrolled back into older messages: jump to the latest ones
+            self._render_tail()
+            return
+        self._edit(self._append, batch)
+        self._last = len(self.entries)
+        if len(self._lines) > self.window:
+            self._edit(self._drop_top, len(self._lines) - self.window)
+        self.widget.see(tk.END)
+
+    def _render_tail(self):
+        self._first = max(0, len(self.entries) - self.window)
+        self._last = len(self.entries)
+        self._lines = []
+        self.widget.config(state=tk.NORMAL)
+        self.widget.delete('1.0', tk.END)
+        self._append(self.entries[self._first:])
+        self.widget.config(state=tk.DISABLED)
+        self.widget.see(tk.END)
+
+    def _edit(self, change, *args):
+        self.widget.config(state=tk.NORMAL)
+        change(*args)
+        self.widget.config(state=tk.DISABLED)
+
+    @staticmethod
+    def _format(entries):
+        """(text, tag, text, tag, ...) for one Text.insert, and the line count per entry"""
+        chunks, lines = [], []
+        for stamp, message, tag in entries:
+            if stamp:
+                chunks += [stamp, 'timestamp']
+            chunks += [f"{message}\n\n", tag]
+            lines.append(message.count('\n') + 2)
+        return chunks, lines
+
+    def _append(self, entries):
+        chunks, lines = self._format(entries)
+        if chunks:
+            self.widget.insert(tk.END, *chunks)
+        self._lines += lines
+
+    def _drop_top(self, count):
+        lines = sum(self._lines[:count])
+        self.widget.delete('1.0', f'{lines + 1}.0')
+        del self._lines[:count]
+        self._first += count
+
+    def _drop_bottom(self, count):
+        lines = sum(self._lines[-count:])
+        total = sum(self._lines)
+        self.widget.delete(f'{total - lines + 1}.0', tk.END)
+        del self._lines[-count:]
+        self._last -= count
+
+    def _load_older(self):
+        start = max(0, self._first - self.page)
+        older = self.entries[start:self._first]
+        if not older:
+            return
+        # Render the page at the top, then restore the view to the message
+        # that was on top so the scroll position doesn't jump
+        self.widget.mark_set('transcript_top', '1.0')
+        chunks, lines = self._format(older)
+        self.widget.config(state=tk.NORMAL)
+        self.widget.insert('1.0', *chunks)
+        self._lines = lines + self._lines
+        self._first = start
+        if len(self._lines) > self.window + self.page:
+            self._drop_bottom(len(self._lines) - self.window - self.page)
+        self.widget.config(state=tk.DISABLED)
+        self.widget.yview('transcript_top')
+
+    def _load_newer(self):
+        newer = self.entries[self._last:self._last + self.page]
+        if not newer:
+            return
+        self.widget.config(state=tk.NORMAL)
+        self._append(newer)
+        self._last += len(newer)
+        if len(self._lines) > self.window + self.page:
+            self._drop_top(len(self._lines) - self.window - self.page)
+        self.widget.config(state=tk.DISABLED)
+
+    def _on_scroll(self, first, last):
+        if self._scrollbar is not None:
+            self._scrollbar.set(first, last)
+        # Defer the load: changing the text from inside the scroll callback
+        # would re-enter it
+        if self._scroll_job is None:
+            if float(first) <= 0.0 and self._first > 0:
+                self._scroll_job = self.widget.after_idle(self._scrolled, self._load_older)
+            elif float(last) >= 1.0 and self._last < len(self.entries):
+                self._scroll_job = self.widget.after_idle(self._scrolled, self._load_newer)
+
+    def _scrolled(self, load):
+        self._scroll_job = None
+        load()
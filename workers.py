@@ -0,0 +1,160 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import ERRORS, STAGE_SECONDS, TTS_DROPPED, TTS_QUEUE_DEPTH
+
+
+log = logging.getLogger(__name__)
+
+
+class Busy(Exception):
+    """Raised when the request backlog is full"""
+
+
+class RequestPool:
+    """Fixed-size thread pool with a bounded backlog and cancellation
+
+    ``submit`` refuses new work with Busy once ``max_pending`` requests are
+    queued or running, instead of letting threads pile up.  Submitting with
+    a ``key`` supersedes an earlier request with the same key, and
+    ``cancel_pending`` drops everything submitted so far: requests that
+    have not started are cancelled, and results of ones already running are
+    discarded instead of being passed to their callback.
+    """
+
+    def __init__(self, workers=2, max_pending=16):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chatbot-worker')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._futures = set()
+        self._keyed = {}
+
+    @property
+    def pending(self):
+        """Requests queued or running"""
+        return len(self._futures)
+
+    def submit(self, fn, *args, callback=None, key=None):
+        """Run fn(*args) on a worker and pass the result to callback(result)"""
+        if not self._slots.acquire(blocking=False):
+            raise Busy("Too many requests in flight")
+        with self._lock:
+            epoch = self._epoch
+            superseded = self._keyed.pop(key, None) if key is not None else None
+            future = self._executor.submit(fn, *args)
+            self._futures.add(future)
+            if key is not None:
+                self._keyed[key] = future
+        if superseded is not None:
+            superseded.cancel()
+        future.add_done_callback(lambda f: self._finished(f, epoch, key, callback))
+        return future
+
+    def cancel_pending(self):
+        """Cancel queued requests and discard the results of running ones"""
+        with self._lock:
+            self._epoch += 1
+            futures = list(self._futures)
+            self._keyed.clear()
+        for future in futures:
+            future.cancel()
+
+    def shutdown(self, wait=False):
+        self.cancel_pending()
+        self._executor.shutdown(wait=wait)
+
+    def _finished(self, future, epoch, key, callback):
+        with self._lock:
+            self._futures.discard(future)
+            current = epoch == self._epoch
+            if key is not None and self._keyed.get(key) is future:
+                del self._keyed[key]
+            elif key is not None:
+                current = False
+        self._slots.release()
+        if future.cancelled() or not current or callback is None:
+            return
+        error = future.exception()
+        if error is not None:
+            ERRORS.inc('request')
+            log.error("Error processing request", exc_info=error)
+            return
+        callback(future.result())
+
+
+class SpeechQueue:
+    """Single consumer thread that owns the text-to-speech engine
+
+    pyttsx3 engines are not safe to drive from several threads, so every
+    utterance goes through one queue.  The engine is created by the
+    consumer thread on first use.  When the queue is full the oldest
+    utterance is dropped, so speech never falls far behind the text.
+    """
+
+    def __init__(self, engine_factory, maxsize=4):
+        self._engine_factory = engine_factory
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def say(self, text):
+        self._ensure_started()
+        while True:
+            try:
+                self._queue.put_nowait(text)
+                TTS_QUEUE_DEPTH.set(self._queue.qsize())
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    TTS_DROPPED.inc()
+                except queue.Empty:
+                    pass
+
+    def clear(self):
+        """Drop utterances that have not started yet"""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self):
+        if self._thread is not None:
+            self.clear()
+            self._queue.put(None)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='chatbot-speech', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            engine = self._engine_factory()
+        except Exception:
+            ERRORS.inc('tts')
+            log.exception("Speech engine unavailable")
+            engine = None
+        while True:
+            text = self._queue.get()
+            TTS_QUEUE_DEPTH.set(self._queue.qsize())
+            if text is None:
+                return
+            if engine is None:
+                continue
+            try:
+                with STAGE_SECONDS.time('tts'):
+                    engine.say(text)
+                    engine.runAndWait()
+            except Exception:
+                ERRORS.inc('tts')
+                log.exception("Error in speech synthesis")